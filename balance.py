@@ -0,0 +1,178 @@
+import random
+
+import chorddht
+from chorddht import TOLERANCE, Node, between_right_incl
+from metrics import payload_size
+from ordered import key_load_ratio
+
+CANDIDATES = 5  # Ids candidatos que muestrea un nodo al entrar
+LIGHT_FACTOR = 0.5  # Liviano: menos de esta fracción de la carga promedio
+HEAVY_FACTOR = 2.0  # Pesado: más de este múltiplo de la carga promedio
+
+
+def primary_keys(node):
+    """Llaves de las que `node` es dueño (sin las réplicas que guarda)"""
+    pred = node.predecessor
+    keys = list(node.data.keys())
+    if pred is None or pred is node or not pred.is_alive():
+        return keys
+    return [key for key in keys if between_right_incl(key, pred.id, node.id)]
+
+
+def split_id(node):
+    """Id que deja la mitad baja de las llaves del nodo a un nodo nuevo"""
+    pred = node.predecessor
+    low = pred.id if pred else node.id
+    space = 2**node.m
+    keys = sorted(primary_keys(node), key=lambda key: (key - low) % space)
+    if len(keys) < 2:
+        return None
+    median = keys[len(keys) // 2 - 1]
+    return median if median != node.id else None
+
+
+def sample_owners(entry, rng, candidates=CANDIDATES):
+    """Dueños de `candidates` posiciones al azar, con su carga"""
+    owners = {}
+    for _ in range(candidates):
+        owner = entry.find_successor(rng.randrange(2**entry.m))
+        if owner is not None and owner.is_alive():
+            owners[owner] = len(primary_keys(owner))
+    return owners
+
+
+def choose_id(entry, rng=random, candidates=CANDIDATES):
+    """Entre varias posiciones al azar, parte el rango del dueño más cargado"""
+    owners = sample_owners(entry, rng, candidates)
+    if owners:
+        new_id = split_id(max(owners, key=owners.get))
+        if new_id is not None:
+            return new_id
+    while True:
+        new_id = rng.randrange(2**entry.m)
+        if entry.find_successor(new_id).id != new_id:
+            return new_id
+
+
+def join_at(entry, new_id, node_cls=Node):
+    """Une un nodo nuevo en `new_id` y mueve las llaves por el handoff.
+
+    El nodo nuevo recibe de su sucesor su rango primario y las réplicas de
+    sus TOLERANCE predecesores; cada uno de los TOLERANCE + 1 nodos que
+    siguen suelta el rango que sale de su ventana de réplicas.
+    """
+    owner = entry.find_successor(new_id)
+    low = owner.predecessor
+    node = node_cls(new_id, entry.m)
+    node.join(entry)
+    if low is None or not low.is_alive() or low is owner:
+        return node
+    node.predecessor = node.predecessor or low
+
+    preds = [low]  # p1 .. p(T+1)
+    while len(preds) <= TOLERANCE and preds[-1].predecessor not in (None, node):
+        if preds[-1].predecessor in preds:
+            break
+        preds.append(preds[-1].predecessor)
+    start = preds[min(TOLERANCE, len(preds) - 1)]
+    batch = {
+        key: owner.data[key]
+        for key in list(owner.data.keys())
+        if between_right_incl(key, start.id, new_id)
+    }
+    if batch:
+        node.bulk_store(batch)
+        owner.metrics.inc("handoff_keys", len(batch))
+        owner.metrics.inc("handoff_bytes", payload_size(batch))
+
+    if len(preds) == TOLERANCE + 1:
+        # El j-ésimo sucesor del nodo nuevo ya no replica (p(T-j+2), p(T-j+1)]
+        bounds = [node] + preds
+        holder = owner
+        for j in range(1, TOLERANCE + 2):
+            low_id, high_id = bounds[TOLERANCE + 2 - j].id, bounds[TOLERANCE + 1 - j].id
+            for key in list(holder.data.keys()):
+                if between_right_incl(key, low_id, high_id):
+                    del holder.data[key]
+            holder = holder.get_first_alive_successor()
+    # Como el empalme de `leave`: los predecesores rehacen su lista de
+    # sucesores sin esperar a stabilize (y sin su transfer_data)
+    successor = node
+    for pred in preds[:TOLERANCE]:
+        pred.update_successors([successor] + successor.get_successors())
+        successor = pred
+    return node
+
+
+def join_balanced(entry, node_cls=Node, rng=random, candidates=CANDIDATES):
+    return join_at(entry, choose_id(entry, rng, candidates), node_cls)
+
+
+def rebalance(nodes, rng=random, node_cls=Node, candidates=CANDIDATES):
+    """Una ronda: cada nodo liviano sale y vuelve a entrar en un rango pesado.
+
+    Cada nodo decide con información local: compara su carga con la de unos
+    pocos dueños muestreados. Sale con `leave` (handoff planificado) y entra
+    partiendo el rango más cargado de la muestra. Devuelve la lista de nodos
+    actualizada y cuántos se movieron.
+    """
+    nodes = list(nodes)
+    moved = 0
+    for i, light in enumerate(nodes):
+        if not light.is_alive():
+            continue
+        owners = sample_owners(light, rng, candidates)
+        owners.pop(light, None)
+        if not owners:
+            continue
+        mean = sum(owners.values()) / len(owners)
+        heavy = max(owners, key=owners.get)
+        load = len(primary_keys(light))
+        if load >= LIGHT_FACTOR * mean or owners[heavy] <= HEAVY_FACTOR * mean:
+            continue
+        new_id = split_id(heavy)
+        if new_id is None:
+            continue  # No hay dónde partir: el nodo se queda donde está
+        light.leave()
+        nodes[i] = join_at(heavy, new_id, node_cls)
+        moved += 1
+    return nodes, moved
+
+
+def main():
+    from bootstrap import build_ring
+    from checker import check_ring, format_report
+
+    chorddht.VERBOSE = False
+    m = 16
+    rng = random.Random(0)
+    keys = {key: f"value-{key}" for key in rng.sample(range(2**m), 20000)}
+
+    # Crecimiento: de 8 a 64 nodos con ids al azar o eligiendo entre candidatos
+    for label, balanced in (("ids al azar", False), ("ids por carga", True)):
+        nodes = build_ring(rng.sample(range(2**m), 8), keys, m=m)
+        for _ in range(56):
+            entry = rng.choice(nodes)
+            if balanced:
+                nodes.append(join_balanced(entry, rng=rng))
+            else:
+                nodes.append(join_at(entry, choose_id(entry, rng, 0)))
+        print(f"Unión con {label}: carga máx/prom {key_load_ratio(nodes)}")
+
+    # Reubicación de nodos livianos en un anillo ya desbalanceado
+    nodes = build_ring(rng.sample(range(2**m), 64), keys, m=m)
+    print(f"Anillo de 64 nodos al azar: carga máx/prom {key_load_ratio(nodes)}")
+    for round_ in range(1, 4):
+        nodes, moved = rebalance(nodes, rng)
+        print(
+            f"Ronda {round_}: {moved} nodos reubicados,"
+            f" carga máx/prom {key_load_ratio(nodes)}"
+        )
+    for node in nodes:
+        if node.is_alive():
+            node.fix_finger_table()
+    print(format_report(check_ring(nodes, m=m)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import hashlib
+import math
+from collections.abc import MutableMapping
+
+CAPACITY = 1024  # Llaves esperadas antes de agrandar el filtro
+ERROR_RATE = 0.01  # Tasa de falsos positivos objetivo
+
+
+def _positions(key, size, hashes):
+    """Posiciones por doble hashing: h1 + i·h2"""
+    digest = hashlib.blake2b(str(key).encode(), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return [(h1 + i * h2) % size for i in range(hashes)]
+
+
+def _dimensions(capacity, error_rate):
+    size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+    hashes = max(1, round(size / capacity * math.log(2)))
+    return size, hashes
+
+
+class BloomFilter:
+    """Filtro de Bloom de solo lectura: lo que un nodo comparte con sus vecinos.
+
+    `key in filtro` falso significa que la llave seguro no está; verdadero
+    significa que quizás está.
+    """
+
+    __slots__ = ("bits", "size", "hashes", "version")
+
+    def __init__(self, bits, size, hashes, version=0):
+        self.bits = bits
+        self.size = size
+        self.hashes = hashes
+        self.version = version
+
+    def __contains__(self, key):
+        bits = self.bits
+        positions = _positions(key, self.size, self.hashes)
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in positions)
+
+    def __len__(self):
+        return len(self.bits)  # Bytes que viajan al compartirlo
+
+
+class CountingBloomFilter:
+    """Filtro de Bloom con contadores por posición, así admite borrados"""
+
+    def __init__(self, capacity=CAPACITY, error_rate=ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size, self.hashes = _dimensions(capacity, error_rate)
+        self.counters = bytearray(self.size)
+        self.count = 0
+        self.version = 0
+        self._summary = None
+
+    def add(self, key):
+        for p in _positions(key, self.size, self.hashes):
+            if self.counters[p] < 255:  # Saturado: ya no se decrementa
+                self.counters[p] += 1
+        self.count += 1
+        self.version += 1
+
+    def remove(self, key):
+        for p in _positions(key, self.size, self.hashes):
+            if 0 < self.counters[p] < 255:
+                self.counters[p] -= 1
+        self.count -= 1
+        self.version += 1
+
+    def __contains__(self, key):
+        counters = self.counters
+        return all(counters[p] for p in _positions(key, self.size, self.hashes))
+
+    def summary(self):
+        """Bits del filtro para compartir; se recalcula solo si hubo cambios"""
+        if self._summary is None or self._summary.version != self.version:
+            bits = bytearray((self.size + 7) // 8)
+            for p, counter in enumerate(self.counters):
+                if counter:
+                    bits[p >> 3] |= 1 << (p & 7)
+            self._summary = BloomFilter(
+                bytes(bits), self.size, self.hashes, self.version
+            )
+        return self._summary
+
+
+class FilteredStore(MutableMapping):
+    """Almacén de un nodo que mantiene al día un filtro de sus llaves.
+
+    Se usa como `Node.data`: cada alta o baja actualiza el filtro contador
+    y, si las llaves superan la capacidad, el filtro se reconstruye al doble
+    de tamaño para no degradar la tasa de falsos positivos.
+    """
+
+    def __init__(self, items=(), capacity=CAPACITY, error_rate=ERROR_RATE):
+        self._items = {}
+        self.filter = CountingBloomFilter(capacity, error_rate)
+        self.update(items)
+
+    def __getitem__(self, key):
+        return self._items[key]
+
+    def __setitem__(self, key, value):
+        new = key not in self._items
+        self._items[key] = value
+        if new:
+            self.filter.add(key)
+            if self.filter.count > self.filter.capacity:
+                self._grow()
+
+    def __delitem__(self, key):
+        del self._items[key]
+        self.filter.remove(key)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def _grow(self):
+        old = self.filter
+        self.filter = CountingBloomFilter(2 * old.capacity, old.error_rate)
+        for key in self._items:
+            self.filter.add(key)
+        self.filter.version = old.version + 1
+
+    def summary(self):
+        return self.filter.summary()
+
+
+def main():
+    import random
+
+    import sinHilos
+    from bootstrap import build_ring
+
+    m = 16
+    sinHilos.HASH_SIZE, sinHilos.ID_SPACE = m, 2**m
+    rng = random.Random(0)
+    keys = rng.sample(range(2**m), 6000)
+    stored = {key: f"value-{key}" for key in keys[:4000]}
+    nodes = build_ring(rng.sample(range(2**m), 64), stored, sinHilos.Node, m=m)
+    for node in rng.sample(nodes, 6):
+        node.kill()  # Las lecturas de sus rangos pasan a las réplicas
+    sinHilos.reload_all(nodes)
+    alive = [node for node in nodes if node.is_alive()]
+    origins = [rng.choice(alive) for _ in keys]
+
+    for use_filters in (False, True):
+        for node in nodes:
+            node.probes = node.skipped_probes = 0
+            node.peer_filters = {}
+            if use_filters and node.is_alive():
+                node.share_filters()
+        found = sum(
+            origin.retrieve(key) is not None for origin, key in zip(origins, keys)
+        )
+        probes = sum(node.probes for node in nodes)
+        shared = sum(len(f) for node in nodes for f in node.peer_filters.values())
+        print(
+            f"filtros={use_filters}: {found}/{len(keys)} encontradas,"
+            f" {probes / len(keys):.2f} lecturas remotas por llave,"
+            f" {shared} B de filtros compartidos"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import random
+import time
+from bisect import bisect_left
+
+import chorddht
+from chorddht import HASH_SIZE, TOLERANCE, Node
+
+
+def build_ring(ids, keys=None, node_cls=Node, m=HASH_SIZE, tolerance=TOLERANCE):
+    """Construye un anillo ya convergido sin joins ni rondas de estabilización.
+
+    Ordena los ids una vez y calcula directamente predecesores, listas de
+    sucesores, finger tables y ubicación de llaves: O(N log N + N·m·log N +
+    K log N) en vez de N joins seguidos de recargas completas de la red.
+    `keys` puede ser un dict {llave: valor} o un iterable de llaves.
+    """
+    id_space = 2**m
+    ids = sorted({i % id_space for i in ids})
+    nodes = [node_cls(i) for i in ids]
+    n = len(nodes)
+    if not n:
+        return nodes
+
+    for pos, node in enumerate(nodes):
+        node.predecessor = nodes[pos - 1]
+        if n == 1:
+            node.successors = [node]
+        else:
+            node.successors = [
+                nodes[(pos + j) % n] for j in range(1, min(tolerance + 1, n - 1) + 1)
+            ]
+        if hasattr(node, "m"):
+            node.m = m
+        if hasattr(node, "successors_cache"):
+            node.successors_cache = list(node.successors)
+
+        node.finger = [
+            nodes[bisect_left(ids, (node.id + 2**i) % id_space) % n] for i in range(m)
+        ]
+
+    if keys is not None:
+        if not isinstance(keys, dict):
+            keys = {key: None for key in keys}
+        # Agrupar por nodo para hacer una sola escritura por destino
+        batches = [{} for _ in nodes]
+        replicas = min(tolerance, n - 1)
+        for key, value in keys.items():
+            owner = bisect_left(ids, key % id_space) % n
+            for j in range(replicas + 1):
+                batches[(owner + j) % n][key] = value
+        for node, batch in zip(nodes, batches):
+            node.data.update(batch)
+
+    return nodes
+
+
+def main():
+    from checker import check_ring, format_report
+
+    chorddht.VERBOSE = False
+    m = 16
+    ids = random.sample(range(2**m), 2000)
+    keys = {k: f"value-{k}" for k in random.sample(range(2**m), 5000)}
+
+    start = time.perf_counter()
+    nodes = build_ring(ids, keys, m=m)
+    elapsed = time.perf_counter() - start
+    print(f"Anillo de {len(nodes)} nodos y {len(keys)} llaves en {elapsed:.3f}s")
+    print(format_report(check_ring(nodes, m=m)))
+
+
+if __name__ == "__main__":
+    main()
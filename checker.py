@@ -0,0 +1,138 @@
+from bisect import bisect_left
+
+from chorddht import HASH_SIZE, TOLERANCE, between_right_incl
+
+MAX_VIOLATIONS = 5  # Violaciones guardadas por categoría
+
+
+def _successors_of(node):
+    # chorddht/sinHilos usan `successors`, fitst/mejordefirst usan `successor`
+    succ = getattr(node, "successors", None)
+    if succ is None:
+        succ = node.successor
+    return succ if isinstance(succ, list) else [succ]
+
+
+def true_successor(ids, key, id_space=2**HASH_SIZE):
+    """Sucesor real de `key` en la lista ordenada de ids vivos"""
+    i = bisect_left(ids, key % id_space)
+    return ids[i] if i < len(ids) else ids[0]
+
+
+def check_ring(
+    nodes, m=HASH_SIZE, tolerance=TOLERANCE, max_violations=MAX_VIOLATIONS
+):
+    """Verifica los invariantes del anillo con una sola pasada ordenada.
+
+    Devuelve un reporte compacto: contadores por categoría y las primeras
+    `max_violations` violaciones de cada una, en vez de imprimir el estado.
+    """
+    alive = sorted((n for n in nodes if n.is_alive()), key=lambda n: n.id)
+    ids = [n.id for n in alive]
+    n_alive = len(alive)
+
+    checks = {
+        "successor": 0,
+        "predecessor": 0,
+        "finger": 0,
+        "replica": 0,
+        "ownership": 0,
+    }
+    errors = {name: 0 for name in checks}
+    violations = {name: [] for name in checks}
+
+    def report(kind, ok, detail):
+        checks[kind] += 1
+        if not ok:
+            errors[kind] += 1
+            if len(violations[kind]) < max_violations:
+                violations[kind].append(detail)
+
+    for pos, node in enumerate(alive):
+        succ = alive[(pos + 1) % n_alive]
+        pred = alive[pos - 1]
+
+        # Sucesor y predecesor inmediatos
+        first = next((s for s in _successors_of(node) if s.is_alive()), None)
+        expected = succ if n_alive > 1 else node
+        got = first.id if first is not None else None
+        report(
+            "successor",
+            got == expected.id or (n_alive == 1 and got is None),
+            (node.id, got, expected.id),
+        )
+        got = node.predecessor.id if node.predecessor else None
+        report(
+            "predecessor",
+            got == pred.id or (n_alive == 1 and got in (None, node.id)),
+            (node.id, got, pred.id),
+        )
+
+        # finger[i] debe ser el sucesor real de id + 2^i
+        for i, finger in enumerate(node.finger[:m]):
+            expected = true_successor(ids, node.id + 2**i, 2**m)
+            got = finger.id if finger is not None else None
+            report("finger", got == expected, (node.id, i, got, expected))
+
+        # Cada llave del nodo es primaria o réplica de un predecesor cercano
+        replica_holders = [alive[pos - j] for j in range(min(tolerance, n_alive - 1) + 1)]
+        for key in node.data:
+            owner = true_successor(ids, key, 2**m)
+            report(
+                "ownership",
+                any(h.id == owner for h in replica_holders),
+                (node.id, key, owner),
+            )
+
+        # Las llaves primarias deben estar en los primeros TOLERANCE sucesores
+        for key in node.data:
+            if not between_right_incl(key, pred.id, node.id) and n_alive > 1:
+                continue
+            for j in range(1, min(tolerance, n_alive - 1) + 1):
+                holder = alive[(pos + j) % n_alive]
+                report(
+                    "replica",
+                    key in holder.data,
+                    (key, node.id, holder.id),
+                )
+
+    return {
+        "nodes": len(nodes),
+        "alive": n_alive,
+        "checks": checks,
+        "errors": errors,
+        "violations": {k: v for k, v in violations.items() if v},
+        "ok": not any(errors.values()),
+    }
+
+
+def format_report(report):
+    lines = [
+        f"Ring: {report['alive']}/{report['nodes']} nodos vivos - "
+        + ("OK" if report["ok"] else "INCONSISTENTE")
+    ]
+    for kind, total in report["checks"].items():
+        lines.append(f"  {kind}: {report['errors'][kind]}/{total} errores")
+        for detail in report["violations"].get(kind, []):
+            lines.append(f"    {detail}")
+    return "\n".join(lines)
+
+
+def main():
+    from chorddht import Node, reload_network
+
+    nodes = [Node(2), Node(5), Node(7)]
+    nodes[0].join(None)
+    for node in nodes[1:]:
+        node.join(nodes[0])
+    for _ in range(3):
+        reload_network(nodes)
+        print(format_report(check_ring(nodes)))
+
+    nodes[1].kill()
+    reload_network(nodes)
+    print(format_report(check_ring(nodes)))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,17 @@ import time
 import threading
 from bisect import bisect_right
 
+from expiry import Expiring, ExpiringStore, live_items, live_value
+from metrics import node_metrics, payload_size
+
 HASH_SIZE = 3  # Mayor espacio para distribución
 ID_SPACE = 2**HASH_SIZE
 TOLERANCE = 3
 STABILIZE_INTERVAL = 2
 FIX_FINGERS_INTERVAL = 3
 CHECK_PRED_INTERVAL = 5
+GOSSIP_FANOUT = 4  # Mensajes en los que viaja cada evento de membresía
+GOSSIP_MAX_EVENTS = 8  # Eventos por mensaje
 
 VERBOSE = True
 TABS = 0
@@ -25,18 +30,25 @@ def RemoveTab():
 
 
 class Node:
-    def __init__(self, id, m=HASH_SIZE):
+    def __init__(self, id, m=HASH_SIZE, storage=None):
         self.id = id
         self.predecessor = None
         self.successors = []  # Lista circular ordenada
         self.finger = []
-        self.data = {}
+        # Almacén de llaves: dict en memoria o un backend persistente
+        self.data = storage if storage is not None else {}
+        self.chunks = {}  # Hash de contenido -> [bytes, referencias, posición]
+        self.fragments = {}  # Erasure coding: llave -> {índice: Fragment}
         self.m = m
         self.alive = True
         # self.lock = threading.RLock()
         # Inicialización de finger table
         self.known_nodes = set()  # Cache de nodos conocidos
         self.successors_cache = []  # Cache de sucesores verificados
+        self.metrics = node_metrics(self)
+        # Eventos de membresía a propagar: id -> [tipo, nodo, envíos restantes]
+        self.membership_events = {}
+        self.membership_seen = {}  # id -> último tipo de evento visto
 
         self.finger = [self] * m
         self.predecessor = None
@@ -68,40 +80,136 @@ class Node:
         merged = []
         seen = set()
 
+        dead = []
+
         # Merge y deduplicación
-        for node in set([self] + new_successors + self.successors):
-            if node.id != self.id and node.id not in seen and node.is_alive():
-                merged.append(node)
+        for node in new_successors + self.successors:
+            if node.id != self.id and node.id not in seen:
                 seen.add(node.id)
-                if len(merged) >= TOLERANCE + 1:
-                    break
-
-        # Mantener orden circular
-
-        self.successors = sorted(
-            merged[: TOLERANCE + 1], key=lambda n: (n.id - self.id) % ID_SPACE
-        )
+                if node.is_alive():
+                    merged.append(node)
+                else:
+                    dead.append(node)
+
+        # Mantener orden circular y quedarse con los más cercanos
+        space = 2**self.m
+        self.successors = sorted(merged, key=lambda n: (n.id - self.id) % space)[
+            : TOLERANCE + 1
+        ]
         self.successors_cache = [n for n in self.successors if n.is_alive()]
+        for node in dead:
+            # Hereda el rango el primer sucesor vivo después del caído; si la
+            # lista no llega hasta ahí, que lo anuncie quien sí lo sabe
+            distance = (node.id - self.id) % space
+            heir = next(
+                (n for n in self.successors if (n.id - self.id) % space > distance),
+                None,
+            )
+            if heir is not None:
+                self.report_failure(node, heir)
 
     def get_first_alive_successor(self):
+        dead = []
         for node in self.successors + [self]:
             if node.is_alive():
+                for failed in dead:
+                    self.report_failure(failed, node)
                 return node
+            dead.append(node)
         return self  # Fallback
 
+    # --- Membresía por piggybacking ---
+    def record_event(self, kind, node, heir=None):
+        """Anota un evento nuevo; `heir` es quien hereda el rango de un caído"""
+        if node is self or self.membership_seen.get(node.id) == (kind, node):
+            return False
+        self.membership_seen[node.id] = (kind, node)
+        self.membership_events[node.id] = [kind, node, heir, GOSSIP_FANOUT]
+        return True
+
+    def report_failure(self, dead, heir):
+        """Falla detectada por este nodo: se difunde y, la primera vez, se
+        corrigen directo las fingers que apuntan al caído"""
+        if self.record_event("fail", dead, heir):
+            self.evict_from_fingers(dead, heir)
+            self.replace_finger(dead, heir)  # Las propias, si el recorrido no pasó
+
+    def piggyback(self):
+        """Eventos recientes que viajan en el próximo mensaje saliente"""
+        if not self.membership_events:
+            return []
+        events = []
+        for node_id, event in list(self.membership_events.items()):
+            if event[3] <= 0:
+                del self.membership_events[node_id]
+                continue
+            events.append(tuple(event[:3]))
+            event[3] -= 1
+            if len(events) == GOSSIP_MAX_EVENTS:
+                break
+        return events
+
+    def apply_events(self, events):
+        """Repara sucesores y fingers con eventos recibidos de un vecino"""
+        for kind, node, heir in events:
+            if not self.record_event(kind, node, heir):
+                continue
+            if kind == "join":
+                self.update_successors([node])
+                self.offer_finger(node)
+            elif kind == "fail":
+                if node in self.successors:
+                    # Completar la lista con la del siguiente sucesor vivo
+                    self.successors.remove(node)
+                    alive = self.get_first_alive_successor()
+                    known = alive.get_successors() if alive is not self else []
+                    self.update_successors([alive] + known)
+                self.replace_finger(node, heir)
+
+    def offer_finger(self, node):
+        space = 2**self.m
+        for i in range(self.m):
+            start = (self.id + 2**i) % space
+            current = self.finger[i]
+            if current is node:
+                continue
+            if (node.id - start) % space < (current.id - start) % space:
+                self.finger[i] = node
+
+    def replace_finger(self, dead, heir=None):
+        # El heredero del rango es el sucesor correcto; si no se conoce, el
+        # nodo vivo conocido más cercano después del inicio de cada finger
+        space = 2**self.m
+        known = [n for n in self.successors + self.finger if n.is_alive()] or [self]
+        for i in range(self.m):
+            if self.finger[i] is dead:
+                if heir is not None and heir.is_alive():
+                    self.finger[i] = heir
+                    continue
+                start = (self.id + 2**i) % space
+                self.finger[i] = min(known, key=lambda n: (n.id - start) % space)
+
     # --- Búsqueda optimizada con cache ---
     def find_successor(self, key, hops=0, visited=None):
-        print("\t" * TABS, f"Node {self.id}:", "finding successor of", key)
         if visited is None:
+            # Búsqueda original: medir latencia y saltos del recorrido completo
             visited = set()
+            start = time.perf_counter()
+            node = self.find_successor(key, hops, visited)
+            self.metrics.observe_lookup(time.perf_counter() - start, len(visited))
+            return node
+
+        VERBOSE and print(
+            "\t" * TABS, f"Node {self.id}:", "finding successor of", key
+        )
 
         if hops > self.m:  # Prevenir bucles infinitos
-            print("\t" * TABS, f"Node {self.id}:", "too many hops")
+            VERBOSE and print("\t" * TABS, f"Node {self.id}:", "too many hops")
             return None
 
         # Verificación de cache local
         if self.id == key:
-            print(
+            VERBOSE and print(
                 "\t" * TABS,
                 f"Node {self.id}:",
                 "found itself as the successor for",
@@ -110,9 +218,11 @@ class Node:
             return self
 
         successor = self.get_first_alive_successor()
-        print("\t" * TABS, f"Node {self.id}:", "first alive successor is", successor.id)
+        VERBOSE and print(
+            "\t" * TABS, f"Node {self.id}:", "first alive successor is", successor.id
+        )
         if between_right_incl(key, self.id, successor.id):
-            print(
+            VERBOSE and print(
                 "\t" * TABS,
                 f"Node {self.id}:",
                 "is between",
@@ -124,15 +234,17 @@ class Node:
 
         # Buscar en finger table optimizada
         closest = self.closest_preceding_finger(key)
-        print(
+        VERBOSE and print(
             "\t" * TABS, f"Node {self.id}:", "closest preceding finger is", closest.id
         )
         if closest.id == self.id or closest.id in visited:
-            print("\t" * TABS, f"Node {self.id}:", "no closer finger found for", key)
+            VERBOSE and print(
+                "\t" * TABS, f"Node {self.id}:", "no closer finger found for", key
+            )
             return successor
 
         visited.add(self.id)
-        print(
+        VERBOSE and print(
             "\t" * TABS,
             f"Node {self.id}:",
             "visiting",
@@ -141,26 +253,33 @@ class Node:
             key,
         )
         AddTab()
+        closest.apply_events(self.piggyback())
         sol = closest.find_successor(key, hops + 1, visited)
         RemoveTab()
         return sol
 
     # --- Finger table optimizada ---
     def closest_preceding_finger(self, key):
-        print(f"Node {self.id}:", "finding closest preceding finger for", key)
+        VERBOSE and print(
+            f"Node {self.id}:", "finding closest preceding finger for", key
+        )
         for i in range(self.m - 1, -1, -1):
             node = self.finger[i]
             if node.is_alive() and between(node.id, self.id, key):
-                print(f"Node {self.id}:", "is between", self.id, "and", node.id)
+                VERBOSE and print(
+                    f"Node {self.id}:", "is between", self.id, "and", node.id
+                )
                 return node
-        print(f"Node {self.id}:", "no closer finger found for", key)
+        VERBOSE and print(f"Node {self.id}:", "no closer finger found for", key)
         return self.get_first_alive_successor()
 
     # --- Join mejorado con bootstrap optimizado ---
     def join(self, bootstrap_node: "Node"):
 
         if bootstrap_node:
-            print(f"Node {self.id}:", "joining network through", bootstrap_node.id)
+            VERBOSE and print(
+                f"Node {self.id}:", "joining network through", bootstrap_node.id
+            )
 
             AddTab()
             successor = bootstrap_node.find_successor(self.id)
@@ -197,23 +316,68 @@ class Node:
 
     # --- Replicación de datos automática ---
     def replicate_data(self):
-        for key in list(self.data.keys()):
+        for key, value in live_items(self.data):  # Las vencidas no se replican
             for successor in self.successors[:TOLERANCE]:
                 if successor.is_alive() and successor.id != self.id:
-                    successor.store_replica(key, self.data[key])
-
-    def store(self, key, value):
-
+                    successor.store_replica(key, value)
+                    self.metrics.inc("replication_pushes")
+        self.replicate_chunks()
+
+    def replicate_chunks(self):
+        """Completa en los sucesores los chunks de los que este nodo es dueño"""
+        if not self.chunks:
+            return
+        pred = self.predecessor
+        for digest, entry in self.chunks.items():
+            if pred and not between_right_incl(entry[2], pred.id, self.id):
+                continue  # Réplica de otro dueño: la repone ese dueño
+            for successor in self.successors[:TOLERANCE]:
+                if successor.is_alive() and successor is not self:
+                    if digest not in successor.chunks:
+                        successor.chunks[digest] = list(entry)
+                        self.metrics.inc("replication_pushes")
+
+    def ttl_store(self):
+        """El dict por defecto pasa a un ExpiringStore con el primer valor que
+        vence: así stabilize recupera las vencidas. Un backend propio queda
+        como está."""
+        if type(self.data) is dict:
+            self.data = ExpiringStore(self.data)
+        return self.data
+
+    def store(self, key, value, ttl=None):
+        if ttl is not None:
+            # El vencimiento viaja con el valor a réplicas y handoffs
+            value = Expiring(value, time.time() + ttl)
+            self.ttl_store()
         self.data[key] = value
         self.replicate_data()
 
     def store_replica(self, key, value):
-
+        if isinstance(value, Expiring):
+            self.ttl_store()
         self.data[key] = value
 
+    def retrieve(self, key):
+        """Lee del dueño; si no responde, de sus réplicas"""
+        owner = self.find_successor(key)
+        if owner is None:
+            return None
+        for node in [owner] + owner.successors[:TOLERANCE]:
+            if node.is_alive() and key in node.data:
+                live, value = live_value(node.data.get(key))
+                return value if live else None
+        return None
+
+    def bulk_store(self, items):
+        if any(isinstance(value, Expiring) for value in items.values()):
+            self.ttl_store()
+        self.data.update(items)
+
     # --- Stabilization mejorada con transferencia de datos ---
     def stabilize(self):
-
+        self.metrics.inc("stabilize_rounds")
+        lost = any(not s.is_alive() for s in self.successors)
         successor = self.get_first_alive_successor()
         if successor:
             try:
@@ -223,17 +387,43 @@ class Node:
             except:
                 pass
 
+            successor.apply_events(self.piggyback())
             successor.notify(self)
+            self.apply_events(successor.piggyback())
+            drain = getattr(self.data, "drain", None)
+            if drain:
+                drain()  # Todas las vencidas, de a lotes acotados
+            compact = getattr(self.data, "maybe_compact", None)
+            if compact:
+                compact()  # Log persistente: recuperar espacio de sobrescrituras
+            # La lista se rehace con la del sucesor: así se descartan caídos
+            self.update_successors([successor] + successor.get_successors())
             self.transfer_data(successor)
+            if lost:
+                self.repair_fragments()  # Un sucesor cayó: quizás era del grupo
 
     def transfer_data(self, successor):
 
+        if not self.predecessor:
+            return
         to_transfer = {}
-        for key in list(self.data.keys()):
+        for key, value in live_items(self.data):  # Las vencidas no viajan
             if not between_right_incl(key, self.predecessor.id, self.id):
-                to_transfer[key] = self.data.pop(key)
+                del self.data[key]
+                to_transfer[key] = value
         if to_transfer and successor.is_alive():
             successor.bulk_store(to_transfer)
+            self.metrics.inc("handoff_keys", len(to_transfer))
+            self.metrics.inc("handoff_bytes", payload_size(to_transfer))
+        # Los chunks de otros rangos se copian sin sacarlos: son las réplicas
+        # de las que depende `fetch_chunk`
+        if successor.is_alive() and successor is not self:
+            for digest, entry in self.chunks.items():
+                if not between_right_incl(entry[2], self.predecessor.id, self.id):
+                    if digest not in successor.chunks:
+                        successor.chunks[digest] = list(entry)
+                        self.metrics.inc("handoff_keys")
+                        self.metrics.inc("handoff_bytes", len(entry[0]))
 
     # --- Métodos auxiliares optimizados ---
     def notify(self, node):
@@ -241,13 +431,17 @@ class Node:
         if not self.predecessor or (
             node.is_alive() and between(node.id, self.predecessor.id, self.id)
         ):
+            if self.predecessor and not self.predecessor.is_alive():
+                self.report_failure(self.predecessor, self)
             self.predecessor = node
+            self.metrics.inc("notify_changes")
+            self.record_event("join", node)
             self.update_successors([node] + node.get_successors())
 
     def fix_finger_table(self):
 
         for i in range(self.m):
-            finger_key = (self.id + 2**i) % ID_SPACE
+            finger_key = (self.id + 2**i) % 2**self.m
             node = self.find_successor(finger_key)
             if node:
                 self.finger[i] = node
@@ -257,8 +451,19 @@ class Node:
     def check_predecessor(self):
 
         if self.predecessor and not self.predecessor.is_alive():
+            self.metrics.inc("failures_detected")
+            dead = self.predecessor
             self.predecessor = None
+            # Se difunde y se avisa directo a quienes lo tienen como finger
+            self.report_failure(dead, self)
             self.replicate_data()  # Recuperar datos
+            self.repair_fragments()
+
+    def repair_fragments(self):
+        if self.fragments:
+            from erasure import repair  # Diferido: erasure importa chorddht
+
+            repair(self)
 
     # --- Métodos de ayuda ---
     def get_successors(self):
@@ -272,6 +477,83 @@ class Node:
         self.alive = False
         self.transfer_data(self.get_first_alive_successor())
 
+    # --- Salida ordenada ---
+    def leave(self):
+        """Salida planificada: handoff precalculado y empalme directo del anillo"""
+        successor = self.get_first_alive_successor()
+        pred = self.predecessor
+        if pred and not pred.is_alive():
+            pred = None
+        if successor is self:
+            self.alive = False
+            return
+
+        # 1. Cada rango que este nodo guardaba (primario o réplica) gana una
+        # copia en el nodo que entra a su conjunto de réplicas, y solo ahí
+        chain = [successor] + [s for s in successor.get_successors() if s is not self]
+        owners = [self]
+        node = pred
+        while node and node is not self and len(owners) <= TOLERANCE:
+            owners.append(node)
+            node = node.predecessor
+
+        def targets(key):
+            for j, owner in enumerate(owners):
+                low = owner.predecessor or owners[-1]
+                if j == len(owners) - 1 or between_right_incl(key, low.id, owner.id):
+                    break
+            return chain[: TOLERANCE + 1] if j == 0 else chain[TOLERANCE - j :][:1]
+
+        batches = {}
+        for key, value in live_items(self.data):  # Las vencidas no se entregan
+            for target in targets(key):
+                if key not in target.data:
+                    batches.setdefault(target, {})[key] = value
+        for target, batch in batches.items():
+            target.bulk_store(batch)
+            self.metrics.inc("handoff_keys", len(batch))
+            self.metrics.inc("handoff_bytes", payload_size(batch))
+        # Los chunks siguen el mismo camino según su posición en el anillo
+        for digest, entry in self.chunks.items():
+            for target in targets(entry[2]):
+                if digest not in target.chunks:
+                    target.chunks[digest] = list(entry)
+                    self.metrics.inc("handoff_keys")
+                    self.metrics.inc("handoff_bytes", len(entry[0]))
+
+        # 2. Quien tenga este nodo como finger apunta ahora al sucesor
+        self.evict_from_fingers(self, successor)
+
+        # 3. Empalmar predecesor y sucesor directamente
+        self.alive = False
+        successor.predecessor = pred
+        node = pred
+        for _ in range(TOLERANCE + 1):
+            if not node or node is successor or not node.is_alive():
+                break
+            node.update_successors([successor] + successor.get_successors())
+            node = node.predecessor
+
+    def evict_from_fingers(self, gone, heir):
+        # Los nodos con finger[i] == gone son los p con p + 2^i en el rango de
+        # gone: se parte del más cercano a gone - 2^i y se retrocede
+        for i in range(self.m):
+            start = (gone.id - 2**i) % 2**self.m
+            node = self.find_successor(start)
+            if node and node.id != start:
+                node = node.predecessor
+            visited = set()
+            while node and node is not gone and node.id not in visited:
+                visited.add(node.id)
+                if not node.is_alive():
+                    node = node.predecessor  # Otro caído aún sin reparar
+                    continue
+                if node.finger[i] is gone:
+                    node.finger[i] = heir
+                elif node.finger[i] is not heir:  # Ya corregido por un evento
+                    break
+                node = node.predecessor
+
     def __repr__(self):
         return f"Node {self.id}"
 
@@ -289,8 +571,8 @@ def between(x, a, b):
     return a < x or x < b
 
 
-def hash_value(value):
-    return int(hashlib.sha256(str(value).encode()).hexdigest(), 16) % ID_SPACE
+def hash_value(value, m=HASH_SIZE):
+    return int(hashlib.sha256(str(value).encode()).hexdigest(), 16) % 2**m
 
 
 def reload(node: Node):
@@ -0,0 +1,154 @@
+import hashlib
+
+import chorddht
+from chorddht import HASH_SIZE, TOLERANCE, hash_value
+from expiry import current_value
+
+CHUNK_SIZE = 64 * 1024  # Bytes por chunk
+
+
+class Manifest:
+    """Valor guardado bajo la llave: lista de chunks por su hash de contenido"""
+
+    __slots__ = ("digests", "size")
+
+    def __init__(self, digests, size):
+        self.digests = tuple(digests)
+        self.size = size
+
+    def __repr__(self):
+        return f"Manifest({len(self.digests)} chunks, {self.size} bytes)"
+
+
+def chunk_digest(chunk):
+    return hashlib.sha256(chunk).digest()
+
+
+def chunk_key(digest, m=HASH_SIZE):
+    """Posición en el anillo del dueño de un chunk"""
+    return hash_value(digest.hex(), m)
+
+
+def split(stream, chunk_size=CHUNK_SIZE):
+    """Corta bytes o un iterable de buffers en chunks de tamaño fijo.
+
+    Los bytes/memoryview se cortan sin copiar; solo se copia al juntar
+    pedazos de un iterable que no calzan con el borde de un chunk.
+    """
+    if isinstance(stream, (bytes, bytearray, memoryview)):
+        view = memoryview(stream).cast("B")
+        for start in range(0, len(view), chunk_size):
+            yield view[start : start + chunk_size]
+        return
+    pending = bytearray()
+    for piece in stream:
+        pending += piece
+        while len(pending) >= chunk_size:
+            yield bytes(pending[:chunk_size])
+            del pending[:chunk_size]
+    if pending:
+        yield bytes(pending)
+
+
+def replica_set(node):
+    return [node] + [s for s in node.successors[:TOLERANCE] if s.is_alive()]
+
+
+def store_chunk(node, digest, chunk):
+    """Guarda un chunk en su dueño y réplicas; un chunk repetido no se reenvía"""
+    position = chunk_key(digest, node.m)
+    owner = node.find_successor(position)
+    stored = False
+    for holder in replica_set(owner):
+        entry = holder.chunks.get(digest)
+        if entry is None:
+            holder.chunks[digest] = [bytes(chunk), 1, position]
+            stored = True
+        else:
+            entry[1] += 1  # Solo se cuenta una referencia más
+    return stored
+
+
+def put_blob(node, key, stream, chunk_size=CHUNK_SIZE):
+    """Escribe un valor grande: chunks por contenido y un manifiesto en `key`"""
+    digests = []
+    size = 0
+    for chunk in split(stream, chunk_size):
+        digest = chunk_digest(chunk)
+        store_chunk(node, digest, chunk)
+        digests.append(digest)
+        size += len(chunk)
+    manifest = Manifest(digests, size)
+    node.find_successor(key).store(key, manifest)
+    return manifest
+
+
+def fetch_chunk(node, digest):
+    owner = node.find_successor(chunk_key(digest, node.m))
+    for holder in replica_set(owner):
+        entry = holder.chunks.get(digest)
+        if entry is not None:
+            return memoryview(entry[0])
+    raise KeyError(digest.hex())
+
+
+def iter_blob(node, key):
+    """Lectura en streaming: devuelve un memoryview por chunk, sin concatenar"""
+    manifest = current_value(node.find_successor(key).data.get(key))
+    if manifest is None:
+        return
+    if not isinstance(manifest, Manifest):
+        raise TypeError(f"La llave {key} no guarda un valor por chunks")
+    for digest in manifest.digests:
+        yield fetch_chunk(node, digest)
+
+
+def get_blob(node, key):
+    return b"".join(iter_blob(node, key))
+
+
+def delete_blob(node, key):
+    """Borra el manifiesto y libera los chunks que ya nadie referencia"""
+    owner = node.find_successor(key)
+    manifest = current_value(owner.data.get(key))
+    if not isinstance(manifest, Manifest):
+        return False
+    for holder in replica_set(owner):
+        holder.data.pop(key, None)
+    for digest in manifest.digests:
+        for holder in replica_set(node.find_successor(chunk_key(digest, node.m))):
+            entry = holder.chunks.get(digest)
+            if entry is not None:
+                entry[1] -= 1
+                if entry[1] <= 0:
+                    del holder.chunks[digest]
+    return True
+
+
+def main():
+    from bootstrap import build_ring
+
+    chorddht.VERBOSE = False
+    nodes = build_ring([0, 2, 3, 5, 7])
+    blob = bytes(range(256)) * 1024  # 256 KiB con chunks repetidos
+    manifest = put_blob(nodes[0], 1, blob)
+    put_blob(nodes[2], 4, iter([blob[: CHUNK_SIZE // 2]] * 4))
+    stored = sum(len(node.chunks) for node in nodes)
+    print(manifest, f"{stored} chunks guardados entre todas las réplicas")
+    assert get_blob(nodes[3], 1) == blob
+    print("Lectura en streaming:", [len(c) for c in iter_blob(nodes[4], 4)])
+
+    # En un anillo grande los chunks de un blob se reparten entre los dueños
+    import random
+
+    rng = random.Random(0)
+    nodes = build_ring(rng.sample(range(2**16), 64), m=16)
+    blob = rng.randbytes(40 * CHUNK_SIZE)
+    manifest = put_blob(nodes[0], 1, blob)
+    owners = {nodes[0].find_successor(chunk_key(d, 16)) for d in manifest.digests}
+    holders = sum(bool(node.chunks) for node in nodes)
+    print(f"{manifest}: {len(owners)} dueños, {holders} nodos con chunks")
+
+
+if __name__ == "__main__":
+    main()
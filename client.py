@@ -0,0 +1,277 @@
+import random
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+import chorddht
+from chorddht import HASH_SIZE, TOLERANCE, between_right_incl
+from codec import FINGERS, LOOKUP_REPLY, REPLY, REQUEST
+from expiry import current_value, live_value
+from lookup import Transport, lookup
+
+POOL_SIZE = 512  # Conexiones abiertas que mantiene el cliente
+MAX_ATTEMPTS = TOLERANCE + 4  # Redirecciones y reintentos por operación
+
+# Operaciones y estados del protocolo cliente-nodo
+GET = 0
+PUT = 1
+OK = 0
+MISSING = 1
+REDIRECT = 2
+
+
+class RingMap:
+    """Copia local del mapa id -> nodo; `version` sube con cada corrección"""
+
+    def __init__(self, nodes=(), m=HASH_SIZE):
+        self.space = 2**m
+        self.nodes = {}
+        self.ids = []
+        self.version = 0
+        for node in nodes:
+            self.learn(node)
+
+    def learn(self, node):
+        if self.nodes.get(node.id) is node:
+            return False
+        if node.id not in self.nodes:
+            insort(self.ids, node.id)
+        self.nodes[node.id] = node
+        self.version += 1
+        return True
+
+    def forget(self, node):
+        if self.nodes.get(node.id) is not node:
+            return False
+        del self.nodes[node.id]
+        del self.ids[bisect_left(self.ids, node.id)]
+        self.version += 1
+        return True
+
+    def owner(self, key):
+        if not self.ids:
+            return None
+        i = bisect_left(self.ids, key % self.space)
+        return self.nodes[self.ids[i % len(self.ids)]]
+
+    def replica_set(self, key, count=TOLERANCE + 1):
+        """Dueño y siguientes nodos del mapa, donde viven las réplicas"""
+        if not self.ids:
+            return []
+        i = bisect_left(self.ids, key % self.space)
+        count = min(count, len(self.ids))
+        return [self.nodes[self.ids[(i + j) % len(self.ids)]] for j in range(count)]
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class ConnectionPool:
+    """Conexiones abiertas por nodo, con desalojo LRU.
+
+    Abrir una conexión cuesta un RTT de handshake; reutilizarla no cuesta nada.
+    """
+
+    def __init__(self, transport, size=POOL_SIZE):
+        self.transport = transport
+        self.size = size
+        self.connections = OrderedDict()  # id -> nodo
+        self.opened = 0
+        self.reused = 0
+
+    def connect(self, client, node):
+        """Devuelve la latencia extra de abrir la conexión (0 si ya estaba)"""
+        if self.connections.get(node.id) is node:
+            self.connections.move_to_end(node.id)
+            self.reused += 1
+            return 0.0
+        self.connections[node.id] = node
+        if len(self.connections) > self.size:
+            self.connections.popitem(last=False)
+        self.opened += 1
+        return 2 * self.transport.latency(client, node)
+
+    def drop(self, node):
+        if self.connections.get(node.id) is node:
+            del self.connections[node.id]
+
+
+def handle(node, op, key, value=None):
+    """Lado del nodo: atiende la operación si es dueño o redirige"""
+    pred = node.predecessor
+    if (
+        pred is not None
+        and pred is not node
+        and pred.is_alive()
+        and not between_right_incl(key, pred.id, node.id)
+    ):
+        return REDIRECT, node.find_successor(key)
+    if op == PUT:
+        node.store(key, value)
+        return OK, None
+    try:
+        live, value = live_value(node.data[key])
+    except KeyError:
+        live = False
+    if live:
+        return OK, value
+    return MISSING, None
+
+
+def ring_members(node):
+    """Miembros vivos conocidos por `node`, recorriendo sucesores"""
+    members = [node]
+    current = node.get_first_alive_successor()
+    while current is not node and current not in members:
+        members.append(current)
+        current = current.get_first_alive_successor()
+    return members
+
+
+class Client:
+    """Cliente que habla directo con el dueño de cada llave.
+
+    Arranca pidiendo el mapa del anillo a cualquier nodo y luego envía cada
+    operación al dueño según su copia local: un solo RTT si el mapa está al
+    día. Las redirecciones corrigen el mapa y un nodo caído se olvida y se
+    reintenta en la siguiente réplica.
+    """
+
+    def __init__(self, bootstrap, transport, m=HASH_SIZE, name="client"):
+        self.id = name
+        self.m = m
+        self.transport = transport
+        self.pool = ConnectionPool(transport)
+        self.map = RingMap(m=m)
+        self.round_trips = 0
+        self.redirects = 0
+        self.failovers = 0
+        self.elapsed = 0.0
+        self.refresh(bootstrap)
+
+    def refresh(self, bootstrap):
+        """Descarga el mapa completo desde un nodo vivo"""
+        members = getattr(bootstrap, "table", None)
+        members = list(members.nodes.values()) if members else ring_members(bootstrap)
+        self.elapsed += self.pool.connect(self, bootstrap)
+        _, out = self.transport.send(self, bootstrap, REQUEST, GET, {})
+        _, back = self.transport.send(
+            bootstrap, self, FINGERS, [node.id for node in members]
+        )
+        self.elapsed += out + back
+        self.round_trips += 1
+        self.map = RingMap(members, self.m)
+
+    def _request(self, node, op, key, value=None):
+        self.elapsed += self.pool.connect(self, node)
+        self.round_trips += 1
+        if not node.is_alive():
+            # Sin respuesta: se cuenta el viaje de ida perdido
+            self.elapsed += self.transport.latency(self, node)
+            self.pool.drop(node)
+            raise ConnectionError(f"{node} no responde")
+        _, out = self.transport.send(self, node, REQUEST, op, {key: value})
+        status, answer = handle(node, op, key, value)
+        if status == REDIRECT:
+            reply = (LOOKUP_REPLY, key, answer.id) if answer else (REPLY, status, {})
+        else:
+            reply = (REPLY, status, {key: answer})
+        _, back = self.transport.send(node, self, *reply)
+        self.elapsed += out + back
+        return status, answer
+
+    def _execute(self, op, key, value=None):
+        for _ in range(MAX_ATTEMPTS):
+            node = self.map.owner(key)
+            if node is None:
+                raise ConnectionError("El mapa del anillo está vacío")
+            try:
+                status, answer = self._request(node, op, key, value)
+            except ConnectionError:
+                self.failovers += 1
+                self.map.forget(node)
+                continue
+            if status != REDIRECT:
+                return status, answer
+            self.redirects += 1
+            if answer is None or not self.map.learn(answer):
+                # La redirección no enseña nada nuevo: volver a bajar el mapa
+                self.refresh(node)
+        raise ConnectionError(f"No se pudo contactar al dueño de {key}")
+
+    def put(self, key, value):
+        self._execute(PUT, key, value)
+
+    def get(self, key, default=None):
+        status, value = self._execute(GET, key)
+        return value if status == OK else default
+
+    def get_any(self, key, default=None):
+        """Lectura en paralelo a todo el conjunto de réplicas del mapa.
+
+        Cuesta un solo RTT aunque el dueño esté caído, a cambio de más
+        mensajes.
+        """
+        slowest = 0.0
+        value = None
+        for node in self.map.replica_set(key):
+            if not node.is_alive():
+                self.map.forget(node)
+                continue
+            connect = self.pool.connect(self, node)
+            _, out = self.transport.send(self, node, REQUEST, GET, {key: None})
+            value = current_value(node.data.get(key))
+            _, back = self.transport.send(node, self, REPLY, OK, {key: value})
+            slowest = max(slowest, connect + out + back)
+            if value is not None:
+                break
+        self.round_trips += 1
+        self.elapsed += slowest
+        return default if value is None else value
+
+
+def main():
+    from bootstrap import build_ring
+
+    chorddht.VERBOSE = False
+    m = 16
+    rng = random.Random(0)
+    nodes = build_ring(rng.sample(range(2**m), 300), m=m)
+    transport = Transport(lambda a, b: 1.0, m)
+    client = Client(rng.choice(nodes), transport, m)
+    keys = rng.sample(range(2**m), 2000)
+
+    for key in keys:
+        client.put(key, f"value-{key}")
+    entry = rng.choice(nodes)
+    routed = sum(lookup(entry, key)[2] + 2 for key in keys) / len(keys)
+    print(f"RTT por operación a través de un nodo de entrada: {routed:.2f}")
+    print(f"RTT por operación con el cliente: {client.round_trips / len(keys):.2f}")
+
+    # Churn: el mapa del cliente queda viejo y se corrige sobre la marcha
+    for node in rng.sample(nodes, 20):
+        node.kill()
+    taken = {node.id for node in nodes}
+    for node_id in rng.sample([i for i in range(2**m) if i not in taken], 10):
+        newcomer = chorddht.Node(node_id, m)
+        newcomer.join(rng.choice([node for node in nodes if node.is_alive()]))
+        nodes.append(newcomer)
+    for node in nodes:
+        if node.is_alive():
+            node.check_predecessor()
+            node.stabilize()
+    client.round_trips = 0
+    found = sum(client.get(key) == f"value-{key}" for key in keys)
+    print(
+        f"Tras 20 caídas y 10 altas: {found}/{len(keys)} leídas,"
+        f" {client.round_trips / len(keys):.2f} RTT por operación,"
+        f" {client.failovers} reintentos, {client.redirects} redirecciones,"
+        f" mapa v{client.map.version}"
+    )
+    print(
+        f"Conexiones abiertas: {client.pool.opened},"
+        f" reutilizadas: {client.pool.reused}"
+    )
+
+
+if __name__ == "__main__":
+    main()
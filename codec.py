@@ -0,0 +1,231 @@
+import pickle
+import time
+
+from chorddht import HASH_SIZE, TOLERANCE
+
+# Tipos de mensaje del protocolo
+LOOKUP = 1  # llave, origen, saltos
+LOOKUP_REPLY = 2  # llave, dueño
+NOTIFY = 3  # nodo
+STABILIZE_REPLY = 4  # predecesor (opcional), lista de sucesores
+FINGERS = 5  # finger table
+HANDOFF = 6  # lote {llave: valor} de bulk_store
+MEMBERSHIP = 7  # deltas de membresía: altas, caídas
+REQUEST = 8  # operación de cliente, lote {llave: valor}
+REPLY = 9  # estado, lote {llave: valor}
+
+SCHEMAS = {
+    LOOKUP: ("id", "id", "varint"),
+    LOOKUP_REPLY: ("id", "id"),
+    NOTIFY: ("id",),
+    STABILIZE_REPLY: ("opt_id", "ids"),
+    FINGERS: ("ids",),
+    HANDOFF: ("items",),
+    MEMBERSHIP: ("ids", "ids"),
+    REQUEST: ("varint", "items"),
+    REPLY: ("varint", "items"),
+}
+
+# Etiquetas de valores
+NONE = 0
+BYTES = 1
+STR = 2
+INT = 3
+
+
+class CodecError(Exception):
+    pass
+
+
+def encode_varint(value, out):
+    if value < 0:
+        raise CodecError(f"varint negativo: {value}")
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(buf, offset):
+    result = shift = 0
+    while True:
+        if offset >= len(buf):
+            raise CodecError("varint truncado")
+        byte = buf[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, offset
+        shift += 7
+
+
+class Codec:
+    """Codec binario por esquema para los mensajes de Chord.
+
+    Ids y llaves ocupan un ancho fijo derivado de `hash_size`, los largos
+    van en varint y los valores binarios se decodifican como memoryview
+    sobre el buffer recibido, sin copiarlos.
+    """
+
+    def __init__(self, hash_size=HASH_SIZE):
+        self.id_width = max(1, (hash_size + 7) // 8)
+        self.limit = 2**hash_size
+
+    # --- Codificación ---
+    def _id(self, value, out):
+        if not 0 <= value < self.limit:
+            raise CodecError(f"id fuera del espacio: {value}")
+        out += value.to_bytes(self.id_width, "little")
+
+    def _value(self, value, out):
+        if value is None:
+            out.append(NONE)
+            return
+        if isinstance(value, str):
+            tag, raw = STR, value.encode()
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            tag, raw = BYTES, value
+        elif isinstance(value, int):
+            out.append(INT)
+            # zigzag: los negativos también quedan en pocos bytes
+            encode_varint(value << 1 if value >= 0 else (-value << 1) - 1, out)
+            return
+        else:
+            raise CodecError(f"tipo de valor no soportado: {type(value).__name__}")
+        out.append(tag)
+        encode_varint(len(raw), out)
+        out += raw
+
+    def encode(self, kind, *fields):
+        out = bytearray((kind,))
+        for field_type, value in zip(SCHEMAS[kind], fields, strict=True):
+            if field_type == "id":
+                self._id(value, out)
+            elif field_type == "varint":
+                encode_varint(value, out)
+            elif field_type == "opt_id":
+                out.append(value is not None)
+                if value is not None:
+                    self._id(value, out)
+            elif field_type == "ids":
+                encode_varint(len(value), out)
+                for node_id in value:
+                    self._id(node_id, out)
+            elif field_type == "items":
+                encode_varint(len(value), out)
+                for key, item in value.items():
+                    self._id(key, out)
+                    self._value(item, out)
+        return bytes(out)
+
+    # --- Decodificación ---
+    def _read_id(self, buf, offset):
+        end = offset + self.id_width
+        if end > len(buf):
+            raise CodecError("id truncado")
+        return int.from_bytes(buf[offset:end], "little"), end
+
+    def _read_value(self, buf, offset):
+        if offset >= len(buf):
+            raise CodecError("valor truncado")
+        tag = buf[offset]
+        offset += 1
+        if tag == NONE:
+            return None, offset
+        if tag == INT:
+            raw, offset = decode_varint(buf, offset)
+            return (raw >> 1) ^ -(raw & 1), offset
+        length, offset = decode_varint(buf, offset)
+        end = offset + length
+        if end > len(buf):
+            raise CodecError("valor truncado")
+        if tag == BYTES:
+            return buf[offset:end], end
+        if tag == STR:
+            try:
+                return str(buf[offset:end], "utf-8"), end
+            except UnicodeDecodeError as error:
+                raise CodecError(f"texto UTF-8 inválido: {error.reason}") from None
+        raise CodecError(f"etiqueta de valor desconocida: {tag}")
+
+    def decode(self, data):
+        """Devuelve (tipo, campos); los bytes son vistas sobre `data`"""
+        buf = memoryview(data).cast("B")
+        if not buf:
+            raise CodecError("mensaje vacío")
+        kind = buf[0]
+        if kind not in SCHEMAS:
+            raise CodecError(f"tipo de mensaje desconocido: {kind}")
+        offset = 1
+        fields = []
+        for field_type in SCHEMAS[kind]:
+            if field_type == "id":
+                value, offset = self._read_id(buf, offset)
+            elif field_type == "varint":
+                value, offset = decode_varint(buf, offset)
+            elif field_type == "opt_id":
+                if offset >= len(buf):
+                    raise CodecError("id opcional truncado")
+                present = buf[offset]
+                offset += 1
+                value = None
+                if present:
+                    value, offset = self._read_id(buf, offset)
+            elif field_type == "ids":
+                count, offset = decode_varint(buf, offset)
+                value = []
+                for _ in range(count):
+                    node_id, offset = self._read_id(buf, offset)
+                    value.append(node_id)
+            elif field_type == "items":
+                count, offset = decode_varint(buf, offset)
+                value = {}
+                for _ in range(count):
+                    key, offset = self._read_id(buf, offset)
+                    value[key], offset = self._read_value(buf, offset)
+            fields.append(value)
+        if offset != len(buf):
+            raise CodecError("bytes sobrantes al final del mensaje")
+        return kind, tuple(fields)
+
+
+# --- Micro-benchmarks ---
+def _bench(fn, arg, seconds=0.2):
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for _ in range(100):
+            fn(arg)
+        count += 100
+    return count / (time.perf_counter() - start)
+
+
+def benchmark(hash_size=32):
+    codec = Codec(hash_size)
+    space = 2**hash_size
+    messages = {
+        "lookup": (LOOKUP, 12345 % space, 777 % space, 3),
+        "stabilize": (
+            STABILIZE_REPLY,
+            4242 % space,
+            [(i * 97) % space for i in range(TOLERANCE + 1)],
+        ),
+        "handoff": (
+            HANDOFF,
+            {(i * 131) % space: bytes([i]) * 100 for i in range(64)},
+        ),
+    }
+    print(f"{'mensaje':10} {'bytes':>7} {'pickle':>7} {'enc/s':>10} {'dec/s':>10}")
+    for name, message in messages.items():
+        encoded = codec.encode(*message)
+        pickled = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+        enc = _bench(lambda m: codec.encode(*m), message)
+        dec = _bench(codec.decode, encoded)
+        print(f"{name:10} {len(encoded):7d} {len(pickled):7d} {enc:10.0f} {dec:10.0f}")
+        pickle_enc = _bench(lambda m: pickle.dumps(m, pickle.HIGHEST_PROTOCOL), message)
+        pickle_dec = _bench(pickle.loads, pickled)
+        print(f"{'  pickle':10} {'':7} {'':7} {pickle_enc:10.0f} {pickle_dec:10.0f}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,238 @@
+import chorddht
+from chorddht import TOLERANCE
+
+DATA_FRAGMENTS = 6  # k: fragmentos necesarios para reconstruir
+PARITY_FRAGMENTS = TOLERANCE  # m: fragmentos que se pueden perder
+SLACK = TOLERANCE  # Nodos extra a revisar tras el grupo por fragmentos corridos
+
+# --- Aritmética en GF(2^8), polinomio 0x11d ---
+EXP = [0] * 512
+LOG = [0] * 256
+_x = 1
+for _i in range(255):
+    EXP[_i] = _x
+    LOG[_x] = _i
+    _x <<= 1
+    if _x & 0x100:
+        _x ^= 0x11D
+for _i in range(255, 512):
+    EXP[_i] = EXP[_i - 255]
+
+
+def gf_mul(a, b):
+    if not a or not b:
+        return 0
+    return EXP[LOG[a] + LOG[b]]
+
+
+def gf_inv(a):
+    if not a:
+        raise ZeroDivisionError("0 no tiene inverso en GF(256)")
+    return EXP[255 - LOG[a]]
+
+
+# Tabla de multiplicación por constante para bytes.translate
+MUL = [bytes(gf_mul(c, b) for b in range(256)) for c in range(256)]
+
+
+def _combine(coefficients, rows):
+    """Suma en GF(256) de cada fila multiplicada por su coeficiente"""
+    acc = 0
+    for c, row in zip(coefficients, rows):
+        if c:
+            acc ^= int.from_bytes(bytes(row).translate(MUL[c]), "little")
+    return acc.to_bytes(len(rows[0]), "little")
+
+
+def _row(index, k):
+    """Fila de la matriz generadora: identidad para datos, Cauchy para paridad"""
+    if index < k:
+        return [int(j == index) for j in range(k)]
+    return [gf_inv(index ^ j) for j in range(k)]
+
+
+def _invert(matrix):
+    k = len(matrix)
+    rows = [row[:] + [int(i == j) for j in range(k)] for i, row in enumerate(matrix)]
+    for col in range(k):
+        pivot = next(r for r in range(col, k) if rows[r][col])
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        scale = gf_inv(rows[col][col])
+        rows[col] = [gf_mul(scale, v) for v in rows[col]]
+        for r in range(k):
+            factor = rows[r][col]
+            if r != col and factor:
+                rows[r] = [v ^ gf_mul(factor, p) for v, p in zip(rows[r], rows[col])]
+    return [row[k:] for row in rows]
+
+
+# --- Codificación Reed-Solomon sistemática ---
+class Fragment:
+    """Fragmento `index` de un valor codificado en k datos + m paridad"""
+
+    __slots__ = ("index", "k", "m", "length", "data")
+
+    def __init__(self, index, k, m, length, data):
+        self.index = index
+        self.k = k
+        self.m = m
+        self.length = length
+        self.data = data
+
+    def __repr__(self):
+        return f"Fragment({self.index}/{self.k}+{self.m}, {len(self.data)} bytes)"
+
+
+def encode(value, k=DATA_FRAGMENTS, m=PARITY_FRAGMENTS):
+    """Corta `value` en k fragmentos y agrega m de paridad"""
+    if k + m > 256:
+        raise ValueError("GF(256) admite a lo sumo 256 fragmentos")
+    size = max(1, -(-len(value) // k))
+    padded = bytes(value).ljust(size * k, b"\0")
+    data = [padded[i * size : (i + 1) * size] for i in range(k)]
+    parity = [_combine(_row(k + i, k), data) for i in range(m)]
+    return [
+        Fragment(i, k, m, len(value), block) for i, block in enumerate(data + parity)
+    ]
+
+
+def decode(fragments):
+    """Reconstruye el valor con cualquier k fragmentos distintos"""
+    by_index = {f.index: f for f in fragments}
+    if not by_index:
+        raise ValueError("Sin fragmentos")
+    first = next(iter(by_index.values()))
+    k, length = first.k, first.length
+    if len(by_index) < k:
+        raise ValueError(f"Hacen falta {k} fragmentos, hay {len(by_index)}")
+    if all(i in by_index for i in range(k)):
+        data = [by_index[i].data for i in range(k)]
+    else:
+        # Preferir fragmentos de datos: sus filas son de la identidad
+        chosen = sorted(by_index)[:k]
+        inverse = _invert([_row(i, k) for i in chosen])
+        rows = [by_index[i].data for i in chosen]
+        data = [_combine(coefficients, rows) for coefficients in inverse]
+    return b"".join(data)[:length]
+
+
+# --- Ubicación en el anillo ---
+def chain(owner, count):
+    """Dueño y los siguientes nodos vivos, en orden de anillo"""
+    nodes = [owner]
+    current = owner
+    while len(nodes) < count:
+        current = current.get_first_alive_successor()
+        if current in nodes:
+            break
+        nodes.append(current)
+    return nodes
+
+
+def put_coded(node, key, value, k=DATA_FRAGMENTS, m=PARITY_FRAGMENTS):
+    """Guarda `value` como k + m fragmentos en nodos consecutivos desde el dueño"""
+    owner = node.find_successor(key)
+    holders = chain(owner, k + m)
+    for i, fragment in enumerate(encode(value, k, m)):
+        holders[i % len(holders)].fragments.setdefault(key, {})[i] = fragment
+
+
+def _collect(owner, key, k, m):
+    found = {}
+    for holder in chain(owner, k + m + SLACK):
+        for index, fragment in holder.fragments.get(key, {}).items():
+            found.setdefault(index, (holder, fragment))
+    return found
+
+
+def get_coded(node, key, default=None):
+    """Lee k fragmentos de los primeros nodos que los tengan y decodifica"""
+    owner = node.find_successor(key)
+    fragments = {}
+    for holder in chain(owner, DATA_FRAGMENTS + PARITY_FRAGMENTS + SLACK):
+        fragments.update(holder.fragments.get(key, {}))
+        if fragments and len(fragments) >= next(iter(fragments.values())).k:
+            return decode(fragments.values())
+    return default
+
+
+def repair(node):
+    """Regenera los fragmentos perdidos de los grupos donde `node` tiene uno.
+
+    Lo llama la detección de fallas: el sucesor de un nodo caído (desde
+    `check_predecessor`) y su predecesor (desde `stabilize`), así todo grupo
+    que perdió un miembro tiene quien lo repare. Solo se escriben los
+    fragmentos que faltan, en nodos del grupo sin ninguno, así el segundo
+    que llega ya no encuentra trabajo. Devuelve la cantidad regenerada.
+    """
+    repaired = 0
+    for key in list(node.fragments):
+        fragments = node.fragments[key]
+        if not fragments:
+            continue
+        sample = next(iter(fragments.values()))
+        k, m = sample.k, sample.m
+        owner = node.find_successor(key)
+        found = _collect(owner, key, k, m)
+        holders = chain(owner, k + m + SLACK)
+        missing = [i for i in range(k + m) if i not in found]
+        if not missing or len(found) < k:
+            continue
+        rebuilt = encode(decode([f for _, f in found.values()]), k, m)
+        free = [h for h in holders[: k + m] if not h.fragments.get(key)]
+        for i, holder in zip(missing, free or holders):
+            holder.fragments.setdefault(key, {})[i] = rebuilt[i]
+            repaired += 1
+    return repaired
+
+
+def main():
+    import random
+
+    from bootstrap import build_ring
+
+    chorddht.VERBOSE = False
+    m = 16
+    rng = random.Random(0)
+    nodes = build_ring(rng.sample(range(2**m), 40), m=m)
+    values = {rng.randrange(2**m): rng.randbytes(4096) for _ in range(300)}
+    for key, value in values.items():
+        put_coded(nodes[0], key, value)
+
+    raw = sum(len(v) for v in values.values())
+    coded = sum(
+        len(f.data)
+        for node in nodes
+        for group in node.fragments.values()
+        for f in group.values()
+    )
+    print(f"Sobrecosto: replicación {TOLERANCE + 1:.2f}x, erasure {coded / raw:.2f}x")
+
+    # Peor caso: TOLERANCE nodos consecutivos caen juntos
+    start = rng.randrange(len(nodes))
+    for node in nodes[start : start + TOLERANCE]:
+        node.alive = False
+    ok = sum(get_coded(nodes[start - 1], k) == v for k, v in values.items())
+    print(f"Tras {TOLERANCE} caídas consecutivas: {ok}/{len(values)} legibles")
+
+    def count():
+        alive = [node for node in nodes if node.is_alive()]
+        return sum(len(group) for node in alive for group in node.fragments.values())
+
+    before = count()
+    for node in nodes:
+        if node.is_alive():
+            node.check_predecessor()  # Detecta la caída y repara
+            node.stabilize()
+    repaired = count() - before
+    # Otros TOLERANCE consecutivos justo después: sin reparación se perdería
+    # todo grupo que cubra ambas caídas
+    survivor = nodes[start - 1]
+    for node in chain(survivor.get_first_alive_successor(), TOLERANCE):
+        node.alive = False
+    ok = sum(get_coded(survivor, k) == v for k, v in values.items())
+    print(f"{repaired} fragmentos reparados; tras {TOLERANCE} caídas más:", ok)
+
+
+if __name__ == "__main__":
+    main()
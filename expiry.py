@@ -0,0 +1,245 @@
+import time
+from collections import deque
+from collections.abc import MutableMapping
+
+TICK = 0.1  # Segundos por casillero del nivel más fino
+SLOTS = 64  # Casilleros por nivel
+LEVELS = 4  # Horizonte: TICK * SLOTS**LEVELS (~19 días con estos valores)
+EXPIRE_BATCH = 256  # Llaves vencidas que se recuperan por llamada
+
+
+class Expiring:
+    """Valor con vencimiento absoluto; viaja tal cual al replicarse"""
+
+    __slots__ = ("value", "deadline")
+
+    def __init__(self, value, deadline):
+        self.value = value
+        self.deadline = deadline
+
+    def expired(self, now=None):
+        return self.deadline <= (time.time() if now is None else now)
+
+    def __repr__(self):
+        return f"Expiring({self.value!r}, {self.deadline})"
+
+
+def live_value(value, now=None):
+    """(vigente, valor sin envoltorio) para un valor guardado"""
+    if isinstance(value, Expiring):
+        return not value.expired(now), value.value
+    return True, value
+
+
+def current_value(value, now=None):
+    """Valor sin envoltorio, o None si ya venció"""
+    live, value = live_value(value, now)
+    return value if live else None
+
+
+def live_items(data, keys=None, now=None):
+    """Pares (llave, valor guardado) vigentes de un almacén, o solo de `keys`:
+    lo que viaja al replicar, entregar o sincronizar"""
+    now = time.time() if now is None else now
+    for key in list(data.keys()) if keys is None else keys:
+        try:
+            value = data[key]
+        except KeyError:
+            continue  # Venció mientras se recorría
+        if live_value(value, now)[0]:
+            yield key, value
+
+
+class TimerWheel:
+    """Rueda de timers jerárquica: agendar es O(1) y avanzar es O(ticks).
+
+    Un timer cae en el nivel cuyo rango cubre su distancia al tick actual;
+    cuando el reloj completa una vuelta de un nivel, el casillero que toca
+    del nivel de arriba se redistribuye hacia abajo. Los timers no se
+    cancelan: quien los consume descarta los que ya no valen.
+    """
+
+    def __init__(self, tick=TICK, slots=SLOTS, levels=LEVELS, now=0.0):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        self.overflow = []  # Más allá del horizonte de la rueda
+        self.current = int(now // tick)
+        self.due = deque()  # Vencidos pendientes de consumir
+
+    def schedule(self, item, deadline):
+        # Tick siguiente al del vencimiento: al dispararse ya pasó el deadline
+        self._place(int(deadline // self.tick) + 1, item)
+
+    def _place(self, t, item):
+        delta = t - self.current
+        if delta <= 0:
+            self.due.append(item)
+            return
+        span = 1
+        for level in range(self.levels):
+            span *= self.slots
+            if delta < span:
+                index = (t // (span // self.slots)) % self.slots
+                self.wheels[level][index].append((t, item))
+                return
+        self.overflow.append((t, item))
+
+    def advance(self, now):
+        target = int(now // self.tick)
+        while self.current < target:
+            self.current += 1
+            span = 1
+            for level in range(1, self.levels + 1):
+                span *= self.slots
+                if self.current % span:
+                    break
+                if level == self.levels:
+                    entries, self.overflow = self.overflow, []
+                else:
+                    slot = self.wheels[level][(self.current // span) % self.slots]
+                    entries = slot[:]
+                    slot.clear()
+                for t, item in entries:
+                    self._place(t, item)
+            bucket = self.wheels[0][self.current % self.slots]
+            self.due.extend(item for _, item in bucket)
+            bucket.clear()
+
+    def pop_due(self, limit):
+        count = min(limit, len(self.due))
+        return [self.due.popleft() for _ in range(count)]
+
+
+class ExpiringStore(MutableMapping):
+    """Almacén de un nodo con TTL por llave.
+
+    Se usa como `Node.data`. Los valores `Expiring` agendan su vencimiento
+    en una rueda de timers; una llave vencida se descarta al leerla, no
+    aparece al iterar (así queda fuera del handoff y de la anti-entropía) y
+    `expire` la recupera en lotes acotados sin recorrer todo el dict.
+    """
+
+    def __init__(self, items=(), clock=time.time, tick=TICK):
+        self._items = {}
+        self.deadlines = {}
+        self.clock = clock
+        self.wheel = TimerWheel(tick, now=clock())
+        self.reclaimed = 0
+        self.update(items)
+
+    def __setitem__(self, key, value):
+        self._items[key] = value
+        if isinstance(value, Expiring):
+            self.deadlines[key] = value.deadline
+            self.wheel.schedule((key, value.deadline), value.deadline)
+        else:
+            self.deadlines.pop(key, None)
+
+    def _live(self, key, now=None):
+        deadline = self.deadlines.get(key)
+        if deadline is None:
+            return True
+        if deadline > (self.clock() if now is None else now):
+            return True
+        del self._items[key]  # Vencida: se descarta al leerla
+        del self.deadlines[key]
+        self.reclaimed += 1
+        return False
+
+    def __getitem__(self, key):
+        value = self._items[key]
+        if not self._live(key):
+            raise KeyError(key)
+        return value
+
+    def __delitem__(self, key):
+        del self._items[key]
+        self.deadlines.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self._items and self._live(key)
+
+    def __iter__(self):
+        now = self.clock()
+        return iter([key for key in list(self._items) if self._live(key, now)])
+
+    def __len__(self):
+        return len(self._items)  # Incluye vencidas que nadie leyó ni recuperó
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._items!r})"
+
+    def expire(self, limit=EXPIRE_BATCH):
+        """Recupera hasta `limit` llaves vencidas; devuelve cuántas"""
+        now = self.clock()
+        self.wheel.advance(now)
+        reclaimed = 0
+        for key, deadline in self.wheel.pop_due(limit):
+            # Timer viejo: la llave se reescribió o se borró después
+            if self.deadlines.get(key) == deadline and not self._live(key, now):
+                reclaimed += 1
+        return reclaimed
+
+    def drain(self):
+        """Recupera todas las vencidas hasta ahora, de a lotes de `expire`"""
+        reclaimed = self.expire()
+        while self.wheel.due:
+            reclaimed += self.expire()
+        return reclaimed
+
+
+def main():
+    import random
+
+    rng = random.Random(0)
+    clock = [0.0]
+    store = ExpiringStore(clock=lambda: clock[0])
+    plain = {}
+    ttl = 2.0
+    peak = due = 0
+    # Carga de cache: 2000 escrituras por segundo a llaves nuevas durante 120 s,
+    # con una recuperación cada 2 s (el ritmo de stabilize)
+    for step in range(240000):
+        clock[0] = step / 2000
+        key = rng.randrange(2**32)
+        store[key] = Expiring(f"value-{key}", clock[0] + ttl)
+        plain[key] = f"value-{key}"
+        if step % 4000 == 0:
+            store.drain()
+            due = max(due, len(store.wheel.due))
+        peak = max(peak, len(store))
+    print(f"dict sin TTL: {len(plain)} llaves")
+    print(
+        f"ExpiringStore: pico de {peak} llaves, {len(store)} al final,"
+        f" {due} vencidas sin recuperar tras cada pasada"
+    )
+    clock[0] += ttl + TICK
+    store.drain()
+    print(f"Tras vencer todo: {len(store)} llaves, {store.reclaimed} recuperadas")
+
+    import chorddht
+    from bootstrap import build_ring
+
+    chorddht.VERBOSE = False
+    nodes = build_ring([0, 2, 3, 5, 7])
+    for key in range(8):
+        nodes[0].store(key, f"efímero-{key}", ttl=0.01)
+    nodes[0].store(6, "permanente")
+    print("Antes:", nodes[1].retrieve(4), nodes[1].retrieve(6))
+    time.sleep(2 * TICK)  # La rueda ya disparó sus timers
+    for _ in range(3):
+        for node in nodes:
+            node.stabilize()
+    print("Después:", nodes[1].retrieve(4), nodes[1].retrieve(6))
+    reclaimed = sum(getattr(node.data, "reclaimed", 0) for node in nodes)
+    print(
+        "Copias guardadas en el anillo:",
+        sum(len(node.data) for node in nodes),
+        f"({reclaimed} vencidas recuperadas)",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import random
+import time
+
+import chorddht
+from chorddht import HASH_SIZE, TOLERANCE, Node
+from expiry import current_value, live_value
+from lookup import next_hop
+
+SKETCH_SIZE = 64  # Llaves que sigue el sketch de cada nodo
+WINDOW = 1.0  # Segundos entre decaimientos del sketch
+HOT_THRESHOLD = 20  # Lecturas por ventana para promover una llave
+HOT_TTL = 5.0  # Segundos que una llave sigue promovida
+PATH_TTL = 0.5  # Vida de una copia en el camino de búsqueda
+PATH_HOPS = 2  # Últimos saltos del camino que guardan la copia
+
+
+class SpaceSaving:
+    """Heavy hitters con memoria acotada (Space-Saving).
+
+    Sigue a lo sumo `capacity` llaves; una llave nueva reemplaza a la de
+    menor cuenta y hereda esa cuenta, así nunca subestima a una llave
+    frecuente. Cada ventana las cuentas se dividen a la mitad para medir la
+    tasa reciente y no el total histórico.
+    """
+
+    def __init__(self, capacity=SKETCH_SIZE, window=WINDOW):
+        self.capacity = capacity
+        self.window = window
+        self.counts = {}
+        self.window_start = None
+
+    def observe(self, key, now):
+        if self.window_start is None or now - self.window_start >= self.window:
+            self.counts = {k: c // 2 for k, c in self.counts.items() if c >= 2}
+            self.window_start = now
+        if key in self.counts:
+            self.counts[key] += 1
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = 1
+        else:
+            victim = min(self.counts, key=self.counts.get)
+            self.counts[key] = self.counts.pop(victim) + 1
+        return self.counts[key]
+
+    def top(self, n=10):
+        return sorted(self.counts.items(), key=lambda item: -item[1])[:n]
+
+
+class HotKeyNode(Node):
+    """Nodo que detecta llaves calientes y reparte sus lecturas.
+
+    El dueño cuenta las lecturas que atiende; si una llave pasa el umbral la
+    marca caliente y lo avisa en la respuesta. El lector aprende entonces el
+    conjunto de réplicas y lee de cualquiera, y los últimos saltos del
+    camino guardan una copia por `PATH_TTL` para cortar búsquedas antes.
+    """
+
+    def __init__(self, id, m=HASH_SIZE, storage=None):
+        super().__init__(id, m, storage)
+        self.sketch = SpaceSaving()
+        self.hot = {}  # Llaves promovidas como dueño -> vencimiento
+        self.known_hot = {}  # Llave -> (réplicas, vencimiento) aprendidas
+        self.path_cache = {}  # Llave -> (valor, vencimiento, réplicas)
+        self.served = 0  # Lecturas atendidas por este nodo
+        self.spread_reads = True
+        self.cache_path = True
+
+    def serve(self, key, now):
+        """Atiende una lectura como dueño; dice si la llave está caliente"""
+        self.served += 1
+        if self.sketch.observe(key, now) >= HOT_THRESHOLD:
+            self.hot[key] = now + HOT_TTL
+        return self.data.get(key), self.hot.get(key, 0) > now
+
+    def serve_replica(self, key):
+        self.served += 1
+        return current_value(self.data.get(key))
+
+    def replica_set(self):
+        return [self] + [s for s in self.successors[:TOLERANCE] if s.is_alive()]
+
+    def cached(self, key, now):
+        """Copia vigente del camino: (valor guardado, réplicas) o None"""
+        entry = self.path_cache.get(key)
+        if entry is None:
+            return None
+        # La copia guarda el valor con su TTL: no sobrevive al original
+        if entry[1] <= now or not live_value(entry[0])[0]:
+            del self.path_cache[key]
+            return None
+        return entry[0], entry[2]
+
+    def retrieve(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        if self.cache_path:
+            hit = self.cached(key, now)
+            if hit:
+                return current_value(hit[0])
+        known = self.known_hot.get(key)
+        if self.spread_reads and known and known[1] > now:
+            replicas = [node for node in known[0] if node.is_alive()]
+            if replicas:
+                return random.choice(replicas).serve_replica(key)
+
+        # Búsqueda iterativa: cualquier salto con copia vigente responde
+        path = [self]
+        done, target = next_hop(self, key)
+        while not done and len(path) <= 2 * self.m:
+            hit = target.cached(key, now) if self.cache_path else None
+            if hit:
+                # La copia trae las réplicas: las próximas lecturas se reparten
+                target.served += 1
+                self.known_hot[key] = (hit[1], now + HOT_TTL)
+                return current_value(hit[0])
+            path.append(target)
+            done, target = next_hop(target, key)
+
+        value, hot = target.serve(key, now)
+        if hot:
+            replicas = target.replica_set()
+            self.known_hot[key] = (replicas, now + HOT_TTL)
+            if self.cache_path:
+                for hop in path[-PATH_HOPS:]:
+                    hop.path_cache[key] = (value, now + PATH_TTL, replicas)
+        return current_value(value)
+
+
+def zipf_keys(keys, count, s=1.1, rng=random):
+    weights = [1 / (rank + 1) ** s for rank in range(len(keys))]
+    return rng.choices(keys, weights, k=count)
+
+
+def main():
+    from bootstrap import build_ring
+
+    chorddht.VERBOSE = False
+    m = 16
+    rng = random.Random(0)
+    random.seed(0)
+    ids = rng.sample(range(2**m), 64)
+    keys = rng.sample(range(2**m), 2000)
+    reads = zipf_keys(keys, 50000, rng=rng)
+
+    for spread, path in ((False, False), (True, False), (True, True)):
+        nodes = build_ring(ids, {k: f"value-{k}" for k in keys}, HotKeyNode, m=m)
+        for node in nodes:
+            node.spread_reads, node.cache_path = spread, path
+        origins = random.Random(1)
+        for i, key in enumerate(reads):
+            origins.choice(nodes).retrieve(key, now=i * 0.001)
+        loads = [node.served for node in nodes]
+        mean = sum(loads) / len(loads)
+        print(
+            f"réplicas={spread!s:5} camino={path!s:5}"
+            f" carga máx/prom: {max(loads) / mean:5.2f}"
+            f" (máx {max(loads)} lecturas)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import random
+
+import chorddht
+from chorddht import between_right_incl
+from codec import LOOKUP, LOOKUP_REPLY, Codec
+
+ITERATIVE = "iterative"
+RECURSIVE = "recursive"
+SEMI_RECURSIVE = "semi-recursive"
+MODES = (ITERATIVE, RECURSIVE, SEMI_RECURSIVE)
+
+
+class Transport:
+    """Transporte simulado: codifica cada mensaje y suma latencia por enlace.
+
+    `latency(a, b)` da el tiempo de ida (ms) entre dos nodos. Lleva la
+    cuenta de mensajes, bytes y mensajes que pasan por cada nodo.
+    """
+
+    def __init__(self, latency, hash_size=chorddht.HASH_SIZE):
+        self.latency = latency
+        self.codec = Codec(hash_size)
+        self.messages = 0
+        self.bytes = 0
+        self.load = {}  # id -> mensajes enviados o recibidos
+
+    def send(self, src, dst, kind, *fields):
+        """Entrega un mensaje y devuelve (campos decodificados, latencia)"""
+        payload = self.codec.encode(kind, *fields)
+        self.messages += 1
+        self.bytes += len(payload)
+        self.load[src.id] = self.load.get(src.id, 0) + 1
+        self.load[dst.id] = self.load.get(dst.id, 0) + 1
+        _, received = self.codec.decode(payload)
+        return received, self.latency(src, dst)
+
+
+def next_hop(node, key):
+    """Paso de ruteo local: (True, dueño) o (False, siguiente salto)"""
+    successor = node.get_first_alive_successor()
+    if node.id == key:
+        return True, node
+    if between_right_incl(key, node.id, successor.id):
+        return True, successor
+    closest = node.closest_preceding_finger(key)
+    if closest is node:
+        return True, successor
+    return False, closest
+
+
+def lookup(origin, key, mode=ITERATIVE, transport=None, max_hops=None):
+    """Busca el sucesor de `key` con la estrategia elegida en esta llamada.
+
+    - iterativa: el origen consulta cada salto y recibe una referencia.
+    - recursiva: cada salto reenvía y la respuesta vuelve por el camino.
+    - semi-recursiva: cada salto reenvía y el último responde al origen.
+
+    Devuelve (dueño, latencia en ms, saltos).
+    """
+    if mode not in MODES:
+        raise ValueError(f"Modo de búsqueda desconocido: {mode}")
+    max_hops = max_hops or 2 * origin.m + 2
+    elapsed = 0.0
+    hops = 0
+    done, target = next_hop(origin, key)
+    path = [origin]
+    current = origin
+    while not done:
+        if hops >= max_hops:
+            break
+        hops += 1
+        if transport is not None:
+            if mode == ITERATIVE:
+                # Consulta y referencia: un RTT entre el origen y el salto
+                _, out = transport.send(origin, target, LOOKUP, key, origin.id, hops)
+                done, answer = next_hop(target, key)
+                _, back = transport.send(target, origin, LOOKUP_REPLY, key, answer.id)
+                elapsed += out + back
+            else:
+                _, out = transport.send(current, target, LOOKUP, key, origin.id, hops)
+                elapsed += out
+                done, answer = next_hop(target, key)
+        else:
+            done, answer = next_hop(target, key)
+        path.append(target)
+        current, target = target, answer
+
+    owner = target
+    if transport is not None and mode != ITERATIVE and current is not origin:
+        if mode == SEMI_RECURSIVE:
+            _, back = transport.send(current, origin, LOOKUP_REPLY, key, owner.id)
+            elapsed += back
+        else:
+            for src, dst in zip(path[:0:-1], path[-2::-1]):
+                _, back = transport.send(src, dst, LOOKUP_REPLY, key, owner.id)
+                elapsed += back
+    return owner, elapsed, hops
+
+
+def coordinate_latency(nodes, base=1.0, spread=50.0, seed=0):
+    """Latencia de ida según distancia entre coordenadas aleatorias"""
+    rng = random.Random(seed)
+    coords = {node.id: (rng.random(), rng.random()) for node in nodes}
+
+    def latency(a, b):
+        (x1, y1), (x2, y2) = coords[a.id], coords[b.id]
+        return base + spread * ((x1 - x2) ** 2 + (y1 - y2) ** 2) ** 0.5
+
+    return latency
+
+
+def benchmark(n=500, lookups=2000, m=16, seed=1):
+    from bootstrap import build_ring
+
+    chorddht.VERBOSE = False
+    rng = random.Random(seed)
+    nodes = build_ring(rng.sample(range(2**m), n), m=m)
+    latency = coordinate_latency(nodes, seed=seed)
+    queries = [(rng.choice(nodes), rng.randrange(2**m)) for _ in range(lookups)]
+
+    print(f"{n} nodos, {lookups} búsquedas")
+    print(
+        f"{'modo':15} {'ms/búsqueda':>12} {'saltos':>7} {'msgs':>6}"
+        f" {'msgs origen':>12}"
+    )
+    for mode in MODES:
+        transport = Transport(latency, m)
+        total = hops = origin_load = 0
+        for origin, key in queries:
+            before = transport.load.get(origin.id, 0)
+            _, elapsed, h = lookup(origin, key, mode, transport)
+            origin_load += transport.load.get(origin.id, 0) - before
+            total += elapsed
+            hops += h
+        print(
+            f"{mode:15} {total / lookups:12.2f} {hops / lookups:7.2f}"
+            f" {transport.messages / lookups:6.2f} {origin_load / lookups:12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    benchmark()
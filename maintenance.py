@@ -0,0 +1,167 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+
+import chorddht
+from chorddht import CHECK_PRED_INTERVAL, FIX_FINGERS_INTERVAL, STABILIZE_INTERVAL
+
+MIN_FACTOR = 0.25  # Intervalo mínimo = base * MIN_FACTOR
+MAX_FACTOR = 8  # Intervalo máximo = base * MAX_FACTOR
+BACKOFF = 2.0
+JITTER = 0.1
+
+
+class AdaptiveInterval:
+    """Intervalo que se acorta cuando una ronda cambia algo y crece si no.
+
+    Una ronda con cambios vuelve al mínimo; cada ronda sin novedades
+    multiplica el intervalo por `backoff` hasta el máximo. El jitter evita
+    que todos los nodos ejecuten la ronda al mismo tiempo.
+    """
+
+    def __init__(
+        self,
+        base,
+        minimum=None,
+        maximum=None,
+        backoff=BACKOFF,
+        jitter=JITTER,
+        rng=random,
+    ):
+        self.base = base
+        self.minimum = base * MIN_FACTOR if minimum is None else minimum
+        self.maximum = base * MAX_FACTOR if maximum is None else maximum
+        self.backoff = backoff
+        self.jitter = jitter
+        self.rng = rng
+        self.current = base
+
+    def update(self, changed):
+        if changed:
+            self.current = self.minimum
+        else:
+            self.current = min(self.current * self.backoff, self.maximum)
+        return self.next()
+
+    def next(self):
+        return self.current * (1 + self.rng.uniform(-self.jitter, self.jitter))
+
+
+def state_signature(node):
+    """Resumen del estado de ruteo para saber si una ronda cambió algo"""
+    pred = node.predecessor
+    return (
+        pred.id if pred else None,
+        tuple(s.id for s in node.successors),
+        tuple(f.id for f in node.finger),
+        node.metrics.counters["failures_detected"],
+    )
+
+
+class Maintenance:
+    """Tareas periódicas de un nodo chorddht con intervalos adaptativos"""
+
+    def __init__(self, node, rng=random):
+        self.node = node
+        self.tasks = {
+            "stabilize": (
+                node.stabilize,
+                AdaptiveInterval(STABILIZE_INTERVAL, rng=rng),
+            ),
+            "fix_fingers": (
+                node.fix_finger_table,
+                AdaptiveInterval(FIX_FINGERS_INTERVAL, rng=rng),
+            ),
+            "check_predecessor": (
+                node.check_predecessor,
+                AdaptiveInterval(CHECK_PRED_INTERVAL, rng=rng),
+            ),
+        }
+        self.rounds = dict.fromkeys(self.tasks, 0)
+        self.changes = dict.fromkeys(self.tasks, 0)
+
+    def run(self, name):
+        """Ejecuta una ronda y devuelve cuánto esperar hasta la siguiente"""
+        task, interval = self.tasks[name]
+        before = state_signature(self.node)
+        task()
+        changed = state_signature(self.node) != before
+        self.rounds[name] += 1
+        self.changes[name] += changed
+        return interval.update(changed)
+
+    def start(self):
+        def loop(name):
+            while self.node.is_alive():
+                time.sleep(self.run(name))
+
+        for name in self.tasks:
+            threading.Thread(target=loop, args=(name,), daemon=True).start()
+
+    def fixed_rounds(self, elapsed):
+        """Rondas que habría hecho el calendario fijo en `elapsed` segundos"""
+        return {
+            name: int(elapsed / interval.base)
+            for name, (_, interval) in self.tasks.items()
+        }
+
+
+def simulate(nodes, duration, events=(), seed=0):
+    """Corre el mantenimiento de todos los nodos con un reloj virtual.
+
+    `events` es una lista de (tiempo, función) para inyectar churn.
+    Devuelve el reporte de rondas adaptativas frente a rondas fijas.
+    """
+    rng = random.Random(seed)
+    schedulers = [Maintenance(node, rng) for node in nodes]
+    order = itertools.count()  # Desempate estable para tiempos iguales
+    queue = []
+    for i, scheduler in enumerate(schedulers):
+        for name, (_, interval) in scheduler.tasks.items():
+            heapq.heappush(queue, (interval.next(), next(order), i, name))
+    for when, fn in events:
+        heapq.heappush(queue, (when, next(order), -1, fn))
+
+    while queue and queue[0][0] <= duration:
+        now, _, i, item = heapq.heappop(queue)
+        if i < 0:
+            item()
+            continue
+        scheduler = schedulers[i]
+        if scheduler.node.is_alive():
+            wait = scheduler.run(item)
+            heapq.heappush(queue, (now + wait, next(order), i, item))
+
+    adaptive = sum(sum(s.rounds.values()) for s in schedulers)
+    fixed = sum(
+        sum(s.fixed_rounds(duration).values())
+        for s in schedulers
+        if s.node.is_alive()
+    )
+    return {
+        "adaptive_rounds": adaptive,
+        "fixed_rounds": fixed,
+        "saved": fixed - adaptive,
+        "changes": sum(sum(s.changes.values()) for s in schedulers),
+    }
+
+
+def main():
+    from checker import check_ring, format_report
+
+    chorddht.VERBOSE = False
+    nodes = [chorddht.Node(i) for i in (0, 2, 3, 5, 7)]
+    nodes[0].join(None)
+    events = [
+        (10 * i, lambda n=node: n.join(nodes[0])) for i, node in enumerate(nodes[1:])
+    ]
+    events.append((200, nodes[2].kill))
+    report = simulate(nodes, 400, events)
+    print(report)
+    print(format_report(check_ring(nodes)))
+
+
+if __name__ == "__main__":
+    main()
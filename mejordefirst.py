@@ -158,7 +158,10 @@ class Node:
 
 
 def hash(value):
-    return int(hashlib.sha1(str(value).encode()).hexdigest(), 16) % (2**HASH_SIZE)
+    # Los valores binarios se hashean tal cual, sin pasarlos a str
+    if not isinstance(value, (bytes, bytearray, memoryview)):
+        value = str(value).encode()
+    return int(hashlib.sha1(value).hexdigest(), 16) % (2**HASH_SIZE)
 
 
 def betweenRightInclusive(x, a, b):
@@ -0,0 +1,224 @@
+import itertools
+import json
+import threading
+import weakref
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = "chord"
+METRICS_PORT = 9100
+
+# Contadores por nodo: nombre -> descripción
+COUNTERS = {
+    "lookups": "Búsquedas find_successor iniciadas por el nodo",
+    "lookup_hops": "Saltos recorridos por las búsquedas del nodo",
+    "stabilize_rounds": "Rondas de stabilize ejecutadas",
+    "notify_changes": "Llamadas a notify que cambiaron el predecesor",
+    "handoff_keys": "Llaves transferidas a otro nodo",
+    "handoff_bytes": "Bytes aproximados transferidos a otro nodo",
+    "replication_pushes": "Réplicas enviadas a sucesores",
+    "failures_detected": "Nodos detectados como caídos",
+}
+
+# Buckets fijos (límite superior inclusivo, estilo Prometheus)
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+HOP_BUCKETS = (0, 1, 2, 3, 4, 6, 8, 12, 16, 24, 32)
+
+
+class Histogram:
+    """Histograma con buckets fijos: observe() es un bisect y dos sumas"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Último bucket = +Inf
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.sum += other.sum
+        self.count += other.count
+
+    def snapshot(self):
+        return {
+            "buckets": list(self.buckets),
+            "counts": list(self.counts),
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+class NodeMetrics:
+    """Métricas de un nodo.
+
+    Sin locks: cada contador lo escribe casi siempre el hilo del propio nodo
+    y bajo el GIL un incremento perdido en una carrera es tolerable, a
+    cambio de no pagar un lock en cada búsqueda.
+    """
+
+    def __init__(self, node_id, instance=0):
+        self.node_id = node_id
+        self.instance = instance  # Distingue nodos con el mismo id
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.lookup_latency = Histogram(LATENCY_BUCKETS)
+        self.lookup_hops = Histogram(HOP_BUCKETS)
+
+    def inc(self, name, amount=1):
+        self.counters[name] += amount
+
+    def observe_lookup(self, seconds, hops):
+        self.counters["lookups"] += 1
+        self.counters["lookup_hops"] += hops
+        self.lookup_latency.observe(seconds)
+        self.lookup_hops.observe(hops)
+
+    def histograms(self):
+        return {
+            "lookup_latency_seconds": self.lookup_latency,
+            "lookup_hops": self.lookup_hops,
+        }
+
+
+class Registry:
+    """Agrega las métricas de todos los nodos del proceso.
+
+    Cada objeto nodo tiene sus propias métricas aunque repita el id de otro
+    (un snapshot restaurado, un anillo reconstruido). El registro guarda
+    referencias débiles: un nodo que ya nadie usa sale solo.
+    """
+
+    def __init__(self):
+        self.nodes = weakref.WeakKeyDictionary()
+        self.lock = threading.Lock()  # Registrar nodos y recorrer el registro
+        self.instances = itertools.count()
+
+    def node(self, node):
+        with self.lock:
+            metrics = self.nodes.get(node)
+            if metrics is None:
+                metrics = NodeMetrics(node.id, next(self.instances))
+                self.nodes[node] = metrics
+        return metrics
+
+    def unregister(self, node):
+        with self.lock:
+            self.nodes.pop(node, None)
+
+    def all(self):
+        """Métricas registradas, ordenadas por id de nodo"""
+        with self.lock:
+            metrics = list(self.nodes.values())
+        return sorted(metrics, key=lambda m: (m.node_id, m.instance))
+
+    def totals(self):
+        counters = dict.fromkeys(COUNTERS, 0)
+        histograms = {
+            "lookup_latency_seconds": Histogram(LATENCY_BUCKETS),
+            "lookup_hops": Histogram(HOP_BUCKETS),
+        }
+        for metrics in self.all():
+            for name, value in metrics.counters.items():
+                counters[name] += value
+            for name, hist in metrics.histograms().items():
+                histograms[name].merge(hist)
+        return counters, histograms
+
+    def snapshot(self):
+        counters, histograms = self.totals()
+        return {
+            "process": {
+                "counters": counters,
+                "histograms": {k: h.snapshot() for k, h in histograms.items()},
+            },
+            "nodes": {
+                f"{m.node_id}#{m.instance}": {
+                    "counters": dict(m.counters),
+                    "histograms": {k: h.snapshot() for k, h in m.histograms().items()},
+                }
+                for m in self.all()
+            },
+        }
+
+    def prometheus(self):
+        lines = []
+        nodes = [
+            (f'node="{m.node_id}",instance="{m.instance}"', m) for m in self.all()
+        ]
+        for name, help_text in COUNTERS.items():
+            metric = f"{PREFIX}_{name}_total"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for labels, m in nodes:
+                lines.append(f"{metric}{{{labels}}} {m.counters[name]}")
+        for name in ("lookup_latency_seconds", "lookup_hops"):
+            metric = f"{PREFIX}_{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, m in nodes:
+                hist = m.histograms()[name]
+                cumulative = 0
+                for bound, count in zip(hist.buckets + ("+Inf",), hist.counts):
+                    cumulative += count
+                    lines.append(
+                        f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}'
+                    )
+                lines.append(f"{metric}_sum{{{labels}}} {hist.sum}")
+                lines.append(f"{metric}_count{{{labels}}} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path, fmt="prometheus"):
+        with open(path, "w") as f:
+            if fmt == "json":
+                json.dump(self.snapshot(), f, indent=2)
+            else:
+                f.write(self.prometheus())
+
+    def serve(self, port=METRICS_PORT, host="127.0.0.1"):
+        """Expone /metrics (Prometheus) y /metrics.json en un hilo aparte"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = registry.prometheus().encode()
+                    content_type = "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body = json.dumps(registry.snapshot()).encode()
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+REGISTRY = Registry()
+
+
+def node_metrics(node):
+    return REGISTRY.node(node)
+
+
+def payload_size(items):
+    """Tamaño aproximado en bytes de un lote {llave: valor}"""
+    size = 0
+    for key, value in items.items():
+        if not isinstance(value, (bytes, bytearray, memoryview)):
+            value = str(value).encode()
+        size += len(str(key)) + len(value)
+    return size
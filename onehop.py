@@ -0,0 +1,181 @@
+import random
+import time
+from bisect import bisect_left, insort
+
+import chorddht
+from chorddht import HASH_SIZE, Node, between_right_incl
+from codec import MEMBERSHIP, Codec
+from lookup import Transport, lookup
+
+ADDRESS_SIZE = 6  # Bytes de dirección por entrada (IPv4 + puerto)
+
+
+class MembershipTable:
+    """Tabla completa y ordenada de miembros: el dueño de una llave es un bisect"""
+
+    def __init__(self, nodes=(), m=HASH_SIZE):
+        self.space = 2**m
+        self.nodes = {node.id: node for node in nodes}
+        self.ids = sorted(self.nodes)
+
+    def copy(self):
+        table = MembershipTable(self.nodes.values())
+        table.space = self.space
+        return table
+
+    def apply(self, kind, node):
+        if kind == "join":
+            if node.id not in self.nodes:
+                insort(self.ids, node.id)
+            self.nodes[node.id] = node
+        elif kind == "fail" and self.nodes.get(node.id) is node:
+            del self.nodes[node.id]
+            del self.ids[bisect_left(self.ids, node.id)]
+
+    def successor(self, key):
+        if not self.ids:
+            return None
+        i = bisect_left(self.ids, key % self.space)
+        return self.nodes[self.ids[i % len(self.ids)]]
+
+    def size_bytes(self, id_width):
+        return len(self.ids) * (id_width + ADDRESS_SIZE)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class OneHopNode(Node):
+    """Nodo que resuelve búsquedas en un salto con la tabla de membresía.
+
+    La tabla se mantiene con deltas de altas y caídas: los eventos que el
+    nodo detecta o recibe por piggybacking la actualizan y quedan en
+    `outbox` hasta que `disseminate` los envía a todos los miembros. Si la
+    tabla está desactualizada se vuelve al ruteo por fingers.
+    """
+
+    def __init__(self, id, m=HASH_SIZE, storage=None):
+        super().__init__(id, m, storage)
+        self.table = MembershipTable([self], m)
+        self.outbox = []  # Deltas (tipo, nodo) pendientes de difundir
+        self.table_hits = 0
+        self.table_misses = 0
+
+    def record_event(self, kind, node, heir=None):
+        if not super().record_event(kind, node, heir):
+            return False
+        self.table.apply(kind, node)
+        self.outbox.append((kind, node))
+        return True
+
+    def receive_deltas(self, deltas):
+        """Deltas recibidos por difusión: se aplican pero no se reenvían"""
+        for kind, node in deltas:
+            if Node.record_event(self, kind, node):
+                self.table.apply(kind, node)
+        # Otro miembro ya difundió lo que este nodo tenía pendiente
+        self.outbox = [delta for delta in self.outbox if delta not in deltas]
+
+    def owns(self, owner, key):
+        """El dueño confirma la llave contra su predecesor actual"""
+        pred = owner.predecessor
+        if pred is None or pred is owner or not pred.is_alive():
+            return True
+        if between_right_incl(key, pred.id, owner.id):
+            return True
+        self.record_event("join", pred)  # Miembro que la tabla no conocía
+        return False
+
+    def find_successor(self, key, hops=0, visited=None):
+        if visited is not None:
+            return super().find_successor(key, hops, visited)
+        start = time.perf_counter()
+        owner = self.table.successor(key)
+        if owner is not None and not owner.is_alive():
+            self.record_event("fail", owner)
+        elif owner is not None and self.owns(owner, key):
+            self.table_hits += 1
+            self.metrics.observe_lookup(time.perf_counter() - start, 1)
+            return owner
+        self.table_misses += 1
+        return super().find_successor(key, hops)
+
+    def join(self, bootstrap_node):
+        if bootstrap_node:
+            # Transferencia de la tabla completa desde el nodo de entrada
+            self.table = bootstrap_node.table.copy()
+        self.table.apply("join", self)
+        self.outbox.append(("join", self))
+        super().join(bootstrap_node)
+
+
+def install_tables(nodes, m=HASH_SIZE):
+    """Carga la tabla completa en cada nodo de un anillo ya armado"""
+    table = MembershipTable([node for node in nodes if node.is_alive()], m)
+    for node in nodes:
+        node.table = table.copy()
+
+
+def disseminate(nodes, transport):
+    """Envía los deltas pendientes de cada nodo a todos los miembros de su tabla.
+
+    Devuelve la cantidad de deltas difundidos.
+    """
+    sent = 0
+    for node in nodes:
+        if not node.is_alive() or not node.outbox:
+            continue
+        deltas, node.outbox = node.outbox, []
+        joins = [n.id for kind, n in deltas if kind == "join"]
+        fails = [n.id for kind, n in deltas if kind == "fail"]
+        for member in list(node.table.nodes.values()):
+            if member is not node and member.is_alive():
+                transport.send(node, member, MEMBERSHIP, joins, fails)
+                member.receive_deltas(deltas)
+        sent += len(deltas)
+    return sent
+
+
+def main():
+    from bootstrap import build_ring
+
+    chorddht.VERBOSE = False
+    m = 16
+    rng = random.Random(0)
+    nodes = build_ring(rng.sample(range(2**m), 300), node_cls=OneHopNode, m=m)
+    install_tables(nodes, m)
+    id_width = Codec(m).id_width
+    print(f"{len(nodes)} nodos, tabla de {nodes[0].table.size_bytes(id_width)} B")
+
+    # Saltos con fingers frente a un salto con la tabla
+    keys = [rng.randrange(2**m) for _ in range(2000)]
+    finger_hops = sum(lookup(rng.choice(nodes), key)[2] + 1 for key in keys)
+    print(f"Saltos promedio con fingers: {finger_hops / len(keys):.2f}, con tabla: 1")
+
+    # Churn: caídas detectadas por los sucesores y difundidas como deltas
+    transport = Transport(lambda a, b: 0.0, m)
+    for node in rng.sample(nodes, 15):
+        node.kill()
+    for node in nodes:
+        if node.is_alive():
+            node.check_predecessor()
+    free = set(range(2**m)) - set(nodes[0].table.nodes)
+    newcomer = OneHopNode(rng.choice(sorted(free)), m)
+    newcomer.join(nodes[0])
+    nodes.append(newcomer)
+    events = disseminate(nodes, transport)
+    print(
+        f"{events} deltas difundidos en {transport.messages} mensajes,"
+        f" {transport.bytes} B ({transport.bytes / max(events, 1):.0f} B/delta)"
+    )
+
+    alive = [node for node in nodes if node.is_alive()]
+    for key in keys:
+        rng.choice(alive).find_successor(key)
+    hits = sum(node.table_hits for node in alive)
+    misses = sum(node.table_misses for node in alive)
+    print(f"Búsquedas en un salto: {hits}, con fallback a fingers: {misses}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import random
+import time
+
+import chorddht
+from chorddht import HASH_SIZE, TOLERANCE
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: solo lo necesita este módulo
+    np = None
+
+
+class RingOracle:
+    """Vista global del anillo: arreglo ordenado de ids vivos.
+
+    Con el arreglo ordenado, el sucesor de cualquier llave es un
+    `searchsorted`, así que millones de llaves o todas las fingers de todos
+    los nodos se resuelven en unas pocas llamadas vectorizadas. Sirve para
+    reconstruir fingers en bloque en simulación y como verdad de referencia
+    para el ruteo del protocolo.
+    """
+
+    def __init__(self, ids=(), m=HASH_SIZE):
+        if np is None:
+            raise ImportError("RingOracle necesita numpy (pip install numpy)")
+        if m > 62:
+            raise ValueError("El oráculo usa int64: m debe ser <= 62")
+        self.m = m
+        self.space = 2**m
+        self.ids = np.unique(np.asarray(list(ids), dtype=np.int64) % self.space)
+        self.offsets = 2 ** np.arange(m, dtype=np.int64)
+
+    @classmethod
+    def from_nodes(cls, nodes, m=HASH_SIZE):
+        return cls([node.id for node in nodes if node.is_alive()], m)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, node_id):
+        pos = np.searchsorted(self.ids, node_id)
+        return pos < len(self.ids) and self.ids[pos] == node_id
+
+    # --- Cambios de membresía ---
+    def join(self, *node_ids):
+        new = np.asarray(node_ids, dtype=np.int64) % self.space
+        self.ids = np.union1d(self.ids, new)
+
+    def kill(self, *node_ids):
+        self.ids = np.setdiff1d(self.ids, np.asarray(node_ids, dtype=np.int64))
+
+    # --- Consultas en bloque ---
+    def successors(self, keys):
+        """Id del sucesor de cada llave; conserva la forma de `keys`"""
+        if not len(self.ids):
+            raise ValueError("Anillo vacío")
+        keys = np.asarray(keys, dtype=np.int64) % self.space
+        return self.ids.take(np.searchsorted(self.ids, keys), mode="wrap")
+
+    def finger_table(self, node_ids=None):
+        """Matriz (nodos, m) con los ids de todas las fingers"""
+        node_ids = self.ids if node_ids is None else np.asarray(node_ids)
+        return self.successors(node_ids[:, None] + self.offsets)
+
+    def successor_lists(self, node_ids=None, length=TOLERANCE + 1):
+        """Matriz (nodos, length) con los siguientes ids vivos de cada nodo"""
+        node_ids = self.ids if node_ids is None else np.asarray(node_ids)
+        first = np.searchsorted(self.ids, node_ids, side="right")
+        length = min(length, max(len(self.ids) - 1, 1))
+        return self.ids.take(first[:, None] + np.arange(length), mode="wrap")
+
+    # --- Integración con los nodos ---
+    def rebuild_fingers(self, nodes, successors=False):
+        """Reemplaza las fingers (y opcionalmente sucesores) de los nodos vivos"""
+        alive = [node for node in nodes if node.is_alive()]
+        by_id = {node.id: node for node in alive}
+        node_ids = np.fromiter((node.id for node in alive), np.int64, len(alive))
+        for node, row in zip(alive, self.finger_table(node_ids).tolist()):
+            node.finger = [by_id[i] for i in row]
+        if successors:
+            lists = self.successor_lists(node_ids).tolist()
+            for node, row in zip(alive, lists):
+                node.successors = [by_id[i] for i in row]
+                if hasattr(node, "successors_cache"):
+                    node.successors_cache = list(node.successors)
+
+    def verify(self, nodes, keys=(), origins=None):
+        """Compara fingers y búsquedas del protocolo contra el oráculo.
+
+        Devuelve {"fingers": (errores, chequeos), "lookups": (errores, chequeos)}.
+        """
+        alive = [node for node in nodes if node.is_alive()]
+        node_ids = np.fromiter((node.id for node in alive), np.int64, len(alive))
+        actual = np.array([[f.id for f in node.finger] for node in alive])
+        finger_errors = int((actual != self.finger_table(node_ids)).sum())
+
+        keys = np.asarray(keys, dtype=np.int64)
+        origins = alive if origins is None or not len(origins) else list(origins)
+        expected = self.successors(keys).tolist() if len(keys) else []
+        lookup_errors = 0
+        for i, (key, owner) in enumerate(zip(keys.tolist(), expected)):
+            found = origins[i % len(origins)].find_successor(key)
+            lookup_errors += found is None or found.id != owner
+        return {
+            "fingers": (finger_errors, actual.size),
+            "lookups": (lookup_errors, len(expected)),
+        }
+
+
+def main():
+    from bootstrap import build_ring
+
+    chorddht.VERBOSE = False
+    m = 20
+    rng = random.Random(0)
+    nodes = build_ring(rng.sample(range(2**m), 2000), m=m)
+    oracle = RingOracle.from_nodes(nodes, m)
+
+    keys = np.random.default_rng(0).integers(0, 2**m, 1_000_000)
+    start = time.perf_counter()
+    oracle.successors(keys)
+    elapsed = time.perf_counter() - start
+    print(f"{len(keys)} sucesores con el oráculo en {elapsed:.3f}s")
+
+    # Churn: el oráculo se actualiza y las fingers quedan desactualizadas
+    killed = rng.sample(nodes, 200)
+    for node in killed:
+        node.kill()
+    oracle.kill(*(node.id for node in killed))
+    print("Tras 200 caídas:", oracle.verify(nodes))
+
+    start = time.perf_counter()
+    for node in nodes:
+        if node.is_alive():
+            node.fix_finger_table()
+    protocol = time.perf_counter() - start
+    for node in nodes:
+        node.finger = [node] * m
+    start = time.perf_counter()
+    oracle.rebuild_fingers(nodes, successors=True)
+    bulk = time.perf_counter() - start
+    print(f"fix_finger_table en todos los nodos: {protocol:.3f}s")
+    print(f"rebuild_fingers del oráculo: {bulk:.3f}s")
+    print("Verificación:", oracle.verify(nodes, keys[:2000].tolist()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import chorddht
+from chorddht import HASH_SIZE, between_right_incl
+from expiry import current_value
+
+
+def ordered_key(value, lo, hi, m=HASH_SIZE):
+    """Posición en el anillo que respeta el orden de `value` en [lo, hi].
+
+    Alternativa a `hash_value` para llaves ordenadas (p. ej. timestamps):
+    valores cercanos caen en nodos vecinos y un rango se lee recorriendo
+    sucesores en vez de consultar todo el anillo.
+    """
+    if not lo <= value <= hi:
+        raise ValueError(f"{value} fuera del rango [{lo}, {hi}]")
+    span = hi - lo
+    if not span:
+        return 0
+    return min(int((value - lo) * 2**m / span), 2**m - 1)
+
+
+class Bucket(dict):
+    """Registros cuyos valores ordenados caen en la misma posición.
+
+    Valor original -> registro. La posición de `ordered_key` es más gruesa
+    que el valor (varios timestamps pueden compartirla): la cubeta los
+    guarda juntos en vez de que uno pise al otro.
+    """
+
+
+def ordered_items(records, lo, hi, m=HASH_SIZE):
+    """{posición: Bucket} para cargar de una vez {valor: registro}"""
+    items = {}
+    for value, record in records.items():
+        position = ordered_key(value, lo, hi, m)
+        items.setdefault(position, Bucket())[value] = record
+    return items
+
+
+def put_ordered(node, value, record, lo, hi, m=HASH_SIZE):
+    """Guarda `record` bajo `value` en la cubeta de su posición"""
+    position = ordered_key(value, lo, hi, m)
+    owner = node.find_successor(position)
+    current = current_value(owner.data.get(position))
+    if current is not None and not isinstance(current, Bucket):
+        raise ValueError(f"La posición {position} no guarda una cubeta ordenada")
+    bucket = Bucket(current or {})
+    bucket[value] = record
+    owner.store(position, bucket)  # Cubeta nueva: las réplicas no comparten
+    return position
+
+
+def prefix_key(text, m=HASH_SIZE, fill=0):
+    """Posición de un string según sus primeros bytes (orden lexicográfico)"""
+    width = (m + 7) // 8
+    raw = text.encode()[:width].ljust(width, bytes([fill]))
+    return int.from_bytes(raw, "big") >> (8 * width - m)
+
+
+def assign_ids(positions, n, m=HASH_SIZE):
+    """Ids de `n` nodos en los cuantiles de las posiciones de una muestra.
+
+    Con colocación ordenada las llaves no se reparten solas; ubicar cada nodo
+    en un cuantil le da a todos aproximadamente la misma cantidad de llaves.
+    """
+    positions = sorted(positions)
+    if not positions:
+        return [i * 2**m // n for i in range(n)]
+    ids = []
+    for i in range(1, n + 1):
+        node_id = positions[i * len(positions) // n - 1]
+        while node_id in ids:
+            node_id = (node_id + 1) % 2**m
+        ids.append(node_id)
+    return ids
+
+
+def _batch(node, start, end):
+    """Registros primarios del nodo dentro de [start, end], ordenados.
+
+    Una cubeta se abre en sus registros, en el orden de sus valores.
+    """
+    low = node.predecessor.id if node.predecessor else node.id
+    batch = []
+    for key in sorted(node.data.keys()):
+        if start <= key <= end and (
+            low == node.id or between_right_incl(key, low, node.id)
+        ):
+            value = current_value(node.data.get(key))
+            if value is None:
+                continue  # Vencida
+            if isinstance(value, Bucket):
+                batch.extend((key, value[v]) for v in sorted(value))
+            else:
+                batch.append((key, value))
+    return batch
+
+
+def _segments(node, start, end):
+    """Nodos a visitar en orden, cada uno con la parte de [start, end] que cubre"""
+    current = node.find_successor(start)
+    while True:
+        if current.id < start:
+            # Dueño que da la vuelta al anillo: cubre toda la cola restante
+            yield current, start, end
+            return
+        yield current, start, min(end, current.id)
+        if end <= current.id:
+            return
+        following = current.get_first_alive_successor()
+        if following.id <= current.id:
+            yield following, current.id + 1, end
+            return
+        current = following
+
+
+def scan(node, start, end, prefetch=True):
+    """Itera (llave, valor) de [start, end] recorriendo sucesores en orden.
+
+    Mientras se consume el lote de un nodo se pide en paralelo el lote del
+    siguiente, así la latencia de cada salto queda solapada con el consumo.
+    """
+    if start > end:
+        raise ValueError("scan no cruza el cero del anillo: start > end")
+    segments = _segments(node, start, end)
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        segment = next(segments)
+        batch = _batch(*segment)
+        while segment:
+            segment = next(segments, None)
+            pending = None
+            if segment and executor is not None:
+                pending = executor.submit(_batch, *segment)
+            yield from batch
+            if segment:
+                batch = pending.result() if pending else _batch(*segment)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+def prefix_scan(node, prefix, m=HASH_SIZE):
+    return scan(node, prefix_key(prefix, m), prefix_key(prefix, m, fill=0xFF))
+
+
+def key_load_ratio(nodes):
+    """Razón entre la carga máxima y la promedio en llaves primarias"""
+    loads = [len(_batch(n, 0, float("inf"))) for n in nodes if n.is_alive()]
+    mean = sum(loads) / len(loads) if loads else 0
+    return round(max(loads) / mean, 2) if mean else 0
+
+
+def main():
+    import random
+
+    from bootstrap import build_ring
+
+    chorddht.VERBOSE = False
+    m = 16
+    rng = random.Random(0)
+    # Timestamps con ráfagas: la mayoría en la primera parte del día
+    times = sorted({int(rng.expovariate(1 / 20000)) % 86400 for _ in range(5000)})
+    keys = ordered_items({t: t for t in times}, 0, 86399, m)
+    print(f"{len(times)} timestamps distintos en {len(keys)} posiciones")
+
+    uniform = build_ring([i * 2**m // 32 for i in range(32)], keys, m=m)
+    balanced = build_ring(assign_ids(keys, 32, m), keys, m=m)
+    print("Razón máx/prom de llaves, ids uniformes:", key_load_ratio(uniform))
+    print("Razón máx/prom de llaves, ids por cuantiles:", key_load_ratio(balanced))
+
+    window = (ordered_key(3600, 0, 86399, m), ordered_key(7200, 0, 86399, m))
+    found = [t for _, t in scan(balanced[0], *window)]
+    expected = [
+        t for t in times if window[0] <= ordered_key(t, 0, 86399, m) <= window[1]
+    ]
+    print(
+        f"scan 01:00-02:00: {len(found)}/{len(expected)} registros,"
+        f" en orden: {found == sorted(found)}"
+    )
+
+    # Una inserción que cae en una posición ocupada se encadena en la cubeta
+    value = next(
+        t + 0.5
+        for t in times
+        if ordered_key(t + 0.5, 0, 86399, m) == ordered_key(t, 0, 86399, m)
+    )
+    position = put_ordered(balanced[0], value, value, 0, 86399, m)
+    bucket = balanced[0].find_successor(position).data[position]
+    print(f"Posición {position}: {sorted(bucket)}")
+
+
+if __name__ == "__main__":
+    main()
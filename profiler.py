@@ -0,0 +1,213 @@
+import argparse
+import contextlib
+import functools
+import importlib
+import io
+import sys
+import threading
+import time
+
+# Operaciones del protocolo que se instrumentan si la clase las define
+OPERATIONS = (
+    "join",
+    "find_successor",
+    "find",
+    "closest_preceding_finger",
+    "stabilize",
+    "notify",
+    "update_successors",
+    "check_successors",
+    "fix_finger_table",
+    "fix_fingers",
+    "check_predecessor",
+    "transfer_data",
+    "replicate_data",
+    "store",
+)
+
+# Escenarios de demo que se pueden correr bajo el profiler
+SCENARIOS = {
+    "chorddht": "main",
+    "mejordefirst": "main",
+}
+
+_SKIP = object()  # Marca de span no muestreado en la pila
+
+
+class Profiler:
+    """Profiler por muestreo: mide 1 de cada `sample_every` operaciones raíz.
+
+    Los spans anidados dentro de una raíz muestreada se miden siempre, así
+    cada pila queda completa y el tiempo se atribuye a la operación que hizo
+    la llamada. Los anidados en una raíz no muestreada no cuestan más que un
+    append/pop.
+    """
+
+    def __init__(self, sample_every=1):
+        self.sample_every = max(1, sample_every)
+        self.roots = 0
+        self.stats = {}  # pila (tupla de nombres) -> [llamadas, wall, cpu]
+        self.local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    @contextlib.contextmanager
+    def span(self, name):
+        stack = self._stack()
+        if stack and stack[-1] is _SKIP:
+            sampled = False
+        elif not stack:
+            self.roots += 1
+            sampled = self.roots % self.sample_every == 0
+        else:
+            sampled = True
+
+        if not sampled:
+            stack.append(_SKIP)
+            try:
+                yield
+            finally:
+                stack.pop()
+            return
+
+        stack.append(name)
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.thread_time() - cpu
+            entry = self.stats.get(tuple(stack))
+            if entry is None:
+                entry = self.stats[tuple(stack)] = [0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += wall
+            entry[2] += cpu
+            stack.pop()
+
+    def summary(self):
+        """Totales por operación: {nombre: (llamadas, wall, cpu)}"""
+        totals = {}
+        for stack, (calls, wall, cpu) in self.stats.items():
+            # Las llamadas recursivas solo cuentan una vez su tiempo
+            if stack[-1] in stack[:-1]:
+                wall = cpu = 0.0
+            c, w, u = totals.get(stack[-1], (0, 0.0, 0.0))
+            totals[stack[-1]] = (c + calls, w + wall, u + cpu)
+        return totals
+
+    def collapsed(self, metric="wall"):
+        """Pilas en formato collapsed (flamegraph.pl / speedscope), en µs propios"""
+        index = 1 if metric == "wall" else 2
+        self_time = {stack: entry[index] for stack, entry in self.stats.items()}
+        for stack, entry in self.stats.items():
+            if len(stack) > 1 and stack[:-1] in self_time:
+                self_time[stack[:-1]] -= entry[index]
+        lines = []
+        for stack, seconds in sorted(self_time.items()):
+            micros = int(round(max(seconds, 0.0) * 1e6))
+            if micros:
+                lines.append(f"{';'.join(stack)} {micros}")
+        return "\n".join(lines) + "\n"
+
+
+PROFILER = None  # Profiler activo; None = hooks desactivados
+
+
+def enable(sample_every=1):
+    global PROFILER
+    PROFILER = Profiler(sample_every)
+    return PROFILER
+
+
+def disable():
+    global PROFILER
+    profiler, PROFILER = PROFILER, None
+    return profiler
+
+
+def profiled(name=None):
+    """Decorador: mide la función como un span si hay un profiler activo"""
+
+    def decorator(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            profiler = PROFILER
+            if profiler is None:
+                return fn(*args, **kwargs)
+            with profiler.span(label):
+                return fn(*args, **kwargs)
+
+        wrapper.__profiled__ = fn
+        return wrapper
+
+    return decorator
+
+
+def instrument(cls, operations=OPERATIONS):
+    """Envuelve los métodos del protocolo de `cls` con spans"""
+    for op in operations:
+        method = cls.__dict__.get(op)
+        if method is not None and not hasattr(method, "__profiled__"):
+            setattr(cls, op, profiled(op)(method))
+
+
+def uninstrument(cls):
+    for op, method in list(cls.__dict__.items()):
+        if hasattr(method, "__profiled__"):
+            setattr(cls, op, method.__profiled__)
+
+
+def run_scenario(module_name, sample_every=1):
+    """Corre la demo de un módulo bajo el profiler, sin su salida por consola"""
+    module = importlib.import_module(module_name)
+    for name in dir(module):
+        cls = getattr(module, name)
+        if isinstance(cls, type) and cls.__module__ == module.__name__:
+            instrument(cls)
+    profiler = enable(sample_every)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            getattr(module, SCENARIOS[module_name])()
+    finally:
+        disable()
+    return profiler
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Corre una demo bajo el profiler y emite pilas collapsed"
+    )
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--sample", type=int, default=1, help="medir 1 de cada N")
+    parser.add_argument("--metric", choices=("wall", "cpu"), default="wall")
+    parser.add_argument("--output", help="archivo de salida (por defecto stdout)")
+    args = parser.parse_args()
+
+    profiler = run_scenario(args.scenario, args.sample)
+    folded = profiler.collapsed(args.metric)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(folded)
+    else:
+        sys.stdout.write(folded)
+
+    for op, (calls, wall, cpu) in sorted(
+        profiler.summary().items(), key=lambda item: -item[1][1]
+    ):
+        print(
+            f"{op:28} {calls:7d} llamadas  wall {wall * 1e3:9.3f} ms"
+            f"  cpu {cpu * 1e3:9.3f} ms",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
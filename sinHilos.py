@@ -2,6 +2,8 @@ import hashlib
 import random
 from bisect import bisect_right
 
+from bloom import FilteredStore
+
 HASH_SIZE = 3
 ID_SPACE = 2**HASH_SIZE
 TOLERANCE = 3
@@ -12,9 +14,13 @@ class Node:
     def __init__(self, node_id):
         self.id = node_id
         self.finger = []
-        self.data = {}
+        self.data = FilteredStore()  # Llaves con filtro de Bloom al día
         self.alive = True
         self.known_dead = set()  # Registro de nodos muertos
+        self.peer_filters = {}  # id -> filtro de llaves de cada sucesor
+        self.pending_writes = {}  # id -> llaves escritas después de esa copia
+        self.probes = 0  # Lecturas remotas hechas por retrieve
+        self.skipped_probes = 0  # Lecturas evitadas por los filtros
 
         self.predecessor = self
         self.successors = []  # Lista de hasta TOLERANCE+1 sucesores
@@ -40,6 +46,11 @@ class Node:
 
     def find_successor(self, key):
         """Versión tolerante a fallos de búsqueda"""
+        current = self.find_predecessor(key)
+        return current.successors[0] if current else self  # Fallback
+
+    def find_predecessor(self, key):
+        """Último salto de la búsqueda: el nodo cuyo sucesor es dueño de `key`"""
         current = self
         visited = set()
 
@@ -54,7 +65,7 @@ class Node:
 
             # Verificar rango directo
             if between_right_incl(key, current.id, current.successors[0].id):
-                return current.successors[0]
+                return current
 
             # Buscar en finger table
             closest = current.closest_preceding_finger(key)
@@ -63,7 +74,7 @@ class Node:
 
             current = closest
 
-        return self  # Fallback
+        return None
 
     def closest_preceding_finger(self, key):
         """Encontrar el nodo vivo más cercano"""
@@ -110,6 +121,47 @@ class Node:
             self.handle_failure(succ)
 
         self.check_successors()
+        self.share_filters()
+
+    def share_filters(self):
+        """Trae el filtro de cada sucesor, solo si cambió desde la última vez"""
+        current = {node.id for node in self.successors}
+        for node_id in list(self.peer_filters):
+            if node_id not in current:
+                del self.peer_filters[node_id]
+        for node in self.successors:
+            cached = self.peer_filters.get(node.id)
+            if cached is None or cached.version != node.data.filter.version:
+                self.peer_filters[node.id] = node.data.summary()
+        # La copia nueva ya incluye las escrituras avisadas
+        self.pending_writes = {}
+
+    def note_write(self, node, key):
+        """Aviso de escritura: `node` guarda `key` aunque la copia de su
+        filtro todavía no lo diga"""
+        self.pending_writes.setdefault(node.id, set()).add(key)
+
+    def replica_candidates(self, key):
+        """Sucesores vivos que quizás guardan `key`, según las copias de sus
+        filtros y los avisos de escritura recibidos desde entonces.
+
+        Devuelve los candidatos y cuántos nodos vivos descartó el filtro.
+        """
+        candidates = []
+        ruled_out = 0
+        for node in self.successors[: TOLERANCE + 1]:
+            if not node.is_alive():
+                continue
+            summary = self.peer_filters.get(node.id)
+            if (
+                summary is None
+                or key in summary
+                or key in self.pending_writes.get(node.id, ())
+            ):
+                candidates.append(node)
+            else:
+                ruled_out += 1
+        return candidates, ruled_out
 
     def notify(self, node):
         """Actualizar predecesor si es válido"""
@@ -130,12 +182,17 @@ class Node:
         """Recuperar datos de nodos muertos"""
         for key in list(self.data.keys()):
             if between_right_incl(key, dead_node.predecessor.id, dead_node.id):
-                self.find_successor(key).data[key] = self.data[key]
+                last = self.find_predecessor(key)
+                owner = last.successors[0] if last else self
+                owner.data[key] = self.data[key]
+                if last:
+                    last.note_write(owner, key)
 
     def store(self, key, value):
         """Almacenamiento con replicación"""
         nodes = []
-        current = self.find_successor(key)
+        last = self.find_predecessor(key)
+        current = last.successors[0] if last else self
 
         # Encontrar TOLERANCE+1 nodos vivos
         for _ in range(TOLERANCE + 1):
@@ -144,17 +201,29 @@ class Node:
             while not current.is_alive():
                 current = current.successors[0]
 
-        # Almacenar en todos los nodos
+        # Almacenar en todos los nodos y avisar al último salto, que filtra
+        # las lecturas de `key` con su copia de los filtros
         for node in nodes[: TOLERANCE + 1]:
             node.data[key] = value
+            if last:
+                last.note_write(node, key)
 
     def retrieve(self, key):
-        """Recuperar dato con reintentos"""
-        for _ in range(TOLERANCE + 1):
-            node = self.find_successor(key)
-            if node.is_alive() and key in node.data:
+        """Recuperar dato del dueño o de sus réplicas.
+
+        El último salto de la búsqueda conoce los filtros de los nodos del
+        conjunto de réplicas y devuelve solo los que quizás tienen la llave:
+        los que seguro no la tienen no se consultan.
+        """
+        last = self.find_predecessor(key)
+        if last is None:
+            return self.data.get(key)
+        candidates, ruled_out = last.replica_candidates(key)
+        self.skipped_probes += ruled_out
+        for node in candidates:
+            self.probes += 1
+            if key in node.data:
                 return node.data[key]
-            key = (key + 1) % ID_SPACE  # Linear probing
         return None
 
     def fix_fingers(self):
@@ -174,6 +243,62 @@ class Node:
             if node.is_alive():
                 node.handle_failure(self)
 
+    def leave(self):
+        """Salida planificada: traspaso único de datos y empalme directo"""
+        self.check_successors()
+        if not self.successors or self.successors[0] is self:
+            self.alive = False
+            return
+        succ = self.successors[0]
+        pred = self.predecessor if self.predecessor.is_alive() else None
+
+        # Cada rango guardado aquí (primario o réplica de un predecesor) gana
+        # una copia en el nodo que entra a su conjunto de réplicas, y solo ahí
+        chain = [succ] + [n for n in succ.successors if n is not self]
+        owners = [self]
+        node = pred
+        while node and node is not self and len(owners) <= TOLERANCE:
+            owners.append(node)
+            node = node.predecessor
+        for key, value in self.data.items():
+            for j, owner in enumerate(owners):
+                if j == len(owners) - 1 or between_right_incl(
+                    key, owner.predecessor.id, owner.id
+                ):
+                    break
+            targets = chain[: TOLERANCE + 1] if j == 0 else chain[TOLERANCE - j :][:1]
+            for node in targets:
+                if key not in node.data:
+                    node.data[key] = value
+                    for hop in owners[1:]:  # Quienes filtran lecturas de `node`
+                        hop.note_write(node, key)
+
+        # Fingers que apuntan a este nodo pasan al sucesor
+        for i in range(HASH_SIZE):
+            start = (self.id - 2**i) % ID_SPACE
+            node = self.find_successor(start)
+            if node.id != start:
+                node = node.predecessor
+            visited = set()
+            while node and node is not self and node.id not in visited:
+                visited.add(node.id)
+                if node.finger[i] is not self:
+                    break
+                node.finger[i] = succ
+                node = node.predecessor
+
+        # Empalme: el sucesor adopta al predecesor y los predecesores que
+        # tenían a este nodo en su lista lo reemplazan sin esperar timeouts
+        self.alive = False
+        succ.predecessor = pred or succ
+        node = pred
+        for _ in range(TOLERANCE + 1):
+            if not node or node is succ or self not in node.successors:
+                break
+            node.successors.remove(self)
+            node.check_successors()
+            node = node.predecessor
+
     def __repr__(self):
         return f"Node {self.id}"
 
@@ -253,4 +378,5 @@ def simulate():
     # print(f"Dato recuperado: {result}" if result else "Dato perdido")
 
 
-simulate()
+if __name__ == "__main__":
+    simulate()
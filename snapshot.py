@@ -0,0 +1,170 @@
+import mmap
+import os
+import pickle
+import random
+import struct
+import tempfile
+import time
+from array import array
+
+import chorddht
+from chorddht import HASH_SIZE, Node
+
+MAGIC = b"CHRD"
+VERSION = 1
+
+# magic, versión, m, ancho de la lista de sucesores, nodos, offsets de secciones
+HEADER = struct.Struct("<4sBBHIQQQQQ")
+RECORD = struct.Struct("<II")  # largo de la llave, largo del valor
+NODE_DATA = struct.Struct("<I")  # llaves del nodo
+
+
+def _pad(f):
+    # Alinear cada sección a 8 bytes para poder castear el memoryview
+    f.write(b"\0" * (-f.tell() % 8))
+    return f.tell()
+
+
+def save_ring(nodes, path, m=HASH_SIZE):
+    """Guarda el estado completo de los nodos vivos en un archivo columnar.
+
+    Columnas de largo fijo (ids, predecesor, sucesores, fingers) como
+    arreglos de índices en el orden de bytes nativo, seguidas de los datos
+    de cada nodo escritos de a un registro, sin armar el archivo en memoria.
+    """
+    alive = sorted((n for n in nodes if n.is_alive()), key=lambda n: n.id)
+    position = {node.id: i for i, node in enumerate(alive)}
+    width = max((len(n.successors) for n in alive), default=0)
+
+    def index(node):
+        return position.get(node.id, -1) if node is not None else -1
+
+    ids = array("Q", (n.id for n in alive))
+    preds = array("q", (index(n.predecessor) for n in alive))
+    succs = array("q")
+    fingers = array("q")
+    for node in alive:
+        row = [index(s) for s in node.successors[:width]]
+        succs.extend(row + [-1] * (width - len(row)))
+        fingers.extend(index(f) for f in node.finger[:m])
+        fingers.extend([-1] * (m - len(node.finger[:m])))
+
+    with open(path, "wb") as f:
+        f.write(b"\0" * HEADER.size)
+        offsets = []
+        for column in (ids, preds, succs, fingers):
+            offsets.append(_pad(f))
+            column.tofile(f)
+        offsets.append(_pad(f))
+        for node in alive:
+            keys = list(node.data.keys())  # Sin las vencidas, que len cuenta
+            f.write(NODE_DATA.pack(len(keys)))
+            for key in keys:
+                raw_key = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+                raw_value = pickle.dumps(node.data[key], pickle.HIGHEST_PROTOCOL)
+                f.write(RECORD.pack(len(raw_key), len(raw_value)))
+                f.write(raw_key)
+                f.write(raw_value)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, m, width, len(alive), *offsets))
+
+
+class Snapshot:
+    """Vista por mmap de un snapshot: las columnas se leen sin copiar"""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, m, width, count, *offsets = HEADER.unpack_from(self.mm)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} no es un snapshot de anillo v{VERSION}")
+        self.m = m
+        self.width = width
+        self.count = count
+        view = memoryview(self.mm)
+        ids_at, preds_at, succs_at, fingers_at, self.data_at = offsets
+        self.ids = view[ids_at : ids_at + 8 * count].cast("Q")
+        self.preds = view[preds_at : preds_at + 8 * count].cast("q")
+        self.succs = view[succs_at : succs_at + 8 * count * width].cast("q")
+        self.fingers = view[fingers_at : fingers_at + 8 * count * m].cast("q")
+
+    def iter_data(self):
+        """Recorre (índice del nodo, llave, valor) en streaming"""
+        offset = self.data_at
+        for i in range(self.count):
+            (keys,) = NODE_DATA.unpack_from(self.mm, offset)
+            offset += NODE_DATA.size
+            for _ in range(keys):
+                key_len, value_len = RECORD.unpack_from(self.mm, offset)
+                offset += RECORD.size
+                key = pickle.loads(self.mm[offset : offset + key_len])
+                offset += key_len
+                value = pickle.loads(self.mm[offset : offset + value_len])
+                offset += value_len
+                yield i, key, value
+
+    def restore(self, node_cls=Node):
+        """Crea los nodos y enlaza punteros desde las columnas"""
+        nodes = [node_cls(node_id) for node_id in self.ids]
+        width, m = self.width, self.m
+        for i, node in enumerate(nodes):
+            pred = self.preds[i]
+            node.predecessor = nodes[pred] if pred >= 0 else None
+            row = self.succs[i * width : (i + 1) * width]
+            node.successors = [nodes[j] for j in row if j >= 0]
+            if hasattr(node, "successors_cache"):
+                node.successors_cache = list(node.successors)
+            if hasattr(node, "m"):
+                node.m = m
+            node.finger = [
+                nodes[j] if j >= 0 else node for j in self.fingers[i * m : (i + 1) * m]
+            ]
+        batch, current = {}, 0
+        for i, key, value in self.iter_data():
+            if i != current:
+                nodes[current].data.update(batch)
+                batch, current = {}, i
+            batch[key] = value
+        if batch:
+            nodes[current].data.update(batch)
+        return nodes
+
+    def close(self):
+        for column in (self.ids, self.preds, self.succs, self.fingers):
+            column.release()
+        self.mm.close()
+        self.file.close()
+
+
+def load_ring(path, node_cls=Node):
+    snapshot = Snapshot(path)
+    try:
+        return snapshot.restore(node_cls)
+    finally:
+        snapshot.close()
+
+
+def main():
+    from bootstrap import build_ring
+    from checker import check_ring, format_report
+
+    chorddht.VERBOSE = False
+    m = 16
+    nodes = build_ring(
+        random.sample(range(2**m), 2000),
+        {k: f"value-{k}" for k in random.sample(range(2**m), 5000)},
+        m=m,
+    )
+    path = os.path.join(tempfile.gettempdir(), "ring.snapshot")
+    start = time.perf_counter()
+    save_ring(nodes, path, m=m)
+    saved = time.perf_counter() - start
+    start = time.perf_counter()
+    restored = load_ring(path)
+    loaded = time.perf_counter() - start
+    print(f"Guardado en {saved * 1e3:.1f} ms, restaurado en {loaded * 1e3:.1f} ms")
+    print(format_report(check_ring(restored, m=m)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import mmap
+import os
+import pickle
+import struct
+import zlib
+from bisect import bisect_right
+from collections.abc import MutableMapping
+
+from chorddht import TOLERANCE, between_right_incl
+from expiry import live_items
+
+SEGMENT_SIZE = 4 * 1024 * 1024  # Bytes por segmento antes de rotar
+COMPACT_RATIO = 0.5  # Compactar cuando la mitad del log es basura
+COMPACT_MIN_BYTES = 1024 * 1024  # ...y hay al menos esta basura para recuperar
+
+# Registro: flag, largo de la llave, largo del valor, crc32 del valor
+HEADER = struct.Struct("<BHII")
+PUT = 0
+DELETE = 1
+
+
+def value_digest(value):
+    """crc32 de un valor tal como lo guarda LogStore"""
+    return zlib.crc32(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+
+class LogStore(MutableMapping):
+    """Almacén persistente: log de solo-anexar más un índice ordenado.
+
+    Se usa como `Node.data`. Los segmentos sellados se leen por mmap sin
+    copiar; el segmento activo se lee con pread. Al abrir se reconstruye el
+    índice recorriendo los segmentos, descartando una cola escrita a medias.
+    """
+
+    def __init__(self, path, segment_size=SEGMENT_SIZE, sync=False):
+        self.path = path
+        self.segment_size = segment_size
+        self.sync = sync
+        self.index = {}  # llave -> (segmento, offset del valor, largo, crc)
+        self.segments = {}  # número -> mmap (solo segmentos sellados)
+        self.dead_bytes = 0
+        self.live_bytes = 0
+        self._sorted = None  # Llaves ordenadas, se recalcula al cambiar el índice
+        os.makedirs(path, exist_ok=True)
+
+        numbers = sorted(
+            int(name[8:-4])
+            for name in os.listdir(path)
+            if name.startswith("segment-") and name.endswith(".log")
+        )
+        for number in numbers:
+            self._replay(number)
+        self.active = numbers[-1] if numbers else 1
+        for number in numbers[:-1]:
+            self._seal(number)
+        self.file = open(self._segment_path(self.active), "a+b")
+
+    # --- Segmentos ---
+    def _segment_path(self, number):
+        return os.path.join(self.path, f"segment-{number:06d}.log")
+
+    def _replay(self, number):
+        with open(self._segment_path(number), "rb") as f:
+            buf = f.read()
+        offset = 0
+        while offset + HEADER.size <= len(buf):
+            flag, key_len, value_len, crc = HEADER.unpack_from(buf, offset)
+            start = offset + HEADER.size
+            end = start + key_len + value_len
+            value = buf[start + key_len : end]
+            if end > len(buf) or (flag == PUT and zlib.crc32(value) != crc):
+                break  # Escritura incompleta al caer el proceso
+            key = pickle.loads(buf[start : start + key_len])
+            self._apply(key, flag, number, start + key_len, value_len, crc)
+            offset = end
+        if offset < len(buf):
+            with open(self._segment_path(number), "r+b") as f:
+                f.truncate(offset)
+
+    def _seal(self, number):
+        with open(self._segment_path(number), "rb") as f:
+            if os.fstat(f.fileno()).st_size:
+                self.segments[number] = mmap.mmap(
+                    f.fileno(), 0, access=mmap.ACCESS_READ
+                )
+
+    def _rotate(self):
+        self.file.close()
+        self._seal(self.active)
+        self.active += 1
+        self.file = open(self._segment_path(self.active), "a+b")
+
+    def _apply(self, key, flag, number, offset, length, crc):
+        old = self.index.pop(key, None)
+        if old is not None:
+            self.dead_bytes += old[2]
+            self.live_bytes -= old[2]
+        if flag == PUT:
+            self.index[key] = (number, offset, length, crc)
+            self.live_bytes += length
+        if (old is None) != (flag == DELETE):
+            self._sorted = None
+
+    def _append(self, key, flag, value=b""):
+        if self.file.tell() >= self.segment_size:
+            self._rotate()
+        raw_key = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+        crc = zlib.crc32(value)
+        offset = self.file.tell() + HEADER.size + len(raw_key)
+        self.file.write(HEADER.pack(flag, len(raw_key), len(value), crc))
+        self.file.write(raw_key)
+        self.file.write(value)
+        self.file.flush()
+        if self.sync:
+            os.fsync(self.file.fileno())
+        self._apply(key, flag, self.active, offset, len(value), crc)
+
+    def _read(self, location):
+        number, offset, length, _ = location
+        segment = self.segments.get(number)
+        if segment is not None:
+            return memoryview(segment)[offset : offset + length]
+        return os.pread(self.file.fileno(), length, offset)
+
+    # --- Interfaz de diccionario ---
+    def __getitem__(self, key):
+        return pickle.loads(self._read(self.index[key]))
+
+    def __setitem__(self, key, value):
+        self._append(key, PUT, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+    def __delitem__(self, key):
+        if key not in self.index:
+            raise KeyError(key)
+        self._append(key, DELETE)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __iter__(self):
+        return iter(list(self.index))
+
+    def __len__(self):
+        return len(self.index)
+
+    # --- Índice ordenado ---
+    def sorted_keys(self):
+        if self._sorted is None:
+            self._sorted = sorted(self.index)
+        return self._sorted
+
+    def range_keys(self, a, b):
+        """Llaves en el intervalo del anillo (a, b]"""
+        keys = self.sorted_keys()
+        if a < b:
+            return keys[bisect_right(keys, a) : bisect_right(keys, b)]
+        return keys[bisect_right(keys, a) :] + keys[: bisect_right(keys, b)]
+
+    def digest(self, keys=None):
+        """crc32 de cada valor sin deserializarlo, para sincronizar deltas"""
+        keys = self.index if keys is None else keys
+        return {key: self.index[key][3] for key in keys if key in self.index}
+
+    # --- Mantenimiento ---
+    def compact(self):
+        """Reescribe solo los registros vivos y borra los segmentos viejos"""
+        old = sorted(set(self.segments) | {self.active})
+        live = [(key, bytes(self._read(loc))) for key, loc in self.index.items()]
+        self.file.close()
+        self.active = old[-1] + 1
+        self.file = open(self._segment_path(self.active), "a+b")
+        self.index = {}
+        self.dead_bytes = self.live_bytes = 0
+        self._sorted = None
+        for key, value in live:
+            self._append(key, PUT, value)
+        for number in old:
+            segment = self.segments.pop(number, None)
+            if segment is not None:
+                segment.close()
+            os.remove(self._segment_path(number))
+
+    def maybe_compact(self):
+        """Compacta si hay suficiente basura; lo llama stabilize en cada ronda"""
+        total = self.dead_bytes + self.live_bytes
+        if (
+            self.dead_bytes >= COMPACT_MIN_BYTES
+            and self.dead_bytes / total >= COMPACT_RATIO
+        ):
+            self.compact()
+            return True
+        return False
+
+    def close(self):
+        self.file.close()
+        for segment in self.segments.values():
+            segment.close()
+        self.segments = {}
+
+
+def _digest(data, keys):
+    if isinstance(data, LogStore):
+        return data.digest(keys)
+    return {key: value_digest(data[key]) for key in keys if key in data}
+
+
+def _range_keys(data, a, b):
+    if isinstance(data, LogStore):
+        return data.range_keys(a, b)
+    return [key for key in data if between_right_incl(key, a, b)]
+
+
+def sync_delta(node, peer, a, b):
+    """Trae de `peer` solo las llaves de (a, b] que faltan o difieren en `node`.
+
+    Devuelve la cantidad de llaves copiadas.
+    """
+    remote = _digest(peer.data, _range_keys(peer.data, a, b))
+    local = _digest(node.data, list(remote))
+    stale = [key for key, crc in remote.items() if local.get(key) != crc]
+    changed = dict(live_items(peer.data, stale))  # Las vencidas no viajan
+    if changed:
+        node.bulk_store(changed)
+    return len(changed)
+
+
+def restore(node):
+    """Resincroniza un nodo reiniciado desde su disco contra sus vecinos.
+
+    El rango primario se compara con el primer sucesor vivo (que guarda una
+    réplica) y cada rango de réplica con el predecesor que es su dueño.
+    Devuelve la cantidad de llaves copiadas por la red.
+    """
+    copied = 0
+    pred = node.predecessor
+    if not pred:
+        return copied
+    successor = node.get_first_alive_successor()
+    if successor is not node:
+        copied += sync_delta(node, successor, pred.id, node.id)
+
+    owner = pred
+    for _ in range(TOLERANCE):
+        if owner is node or not owner.is_alive() or not owner.predecessor:
+            break
+        copied += sync_delta(node, owner, owner.predecessor.id, owner.id)
+        owner = owner.predecessor
+    return copied
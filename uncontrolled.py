@@ -3,6 +3,9 @@ import time
 import threading
 from bisect import bisect_right
 
+from maintenance import AdaptiveInterval, state_signature
+from metrics import node_metrics
+
 HASH_SIZE = 8
 ID_SPACE = 2**HASH_SIZE
 TOLERANCE = 3
@@ -23,21 +26,27 @@ class Node:
         self.lock = threading.RLock()
         self.last_seen = {}  # Track node liveness
         self.failure_counter = {}
+        self.metrics = node_metrics(self)
 
         # Inicialización de finger table
         self.finger = [self] * m
         self.start_background_tasks()
 
     def start_background_tasks(self):
+        # Intervalos adaptativos: cortos tras un cambio, crecen si no pasa nada
         def stabilizer():
+            interval = AdaptiveInterval(STABILIZE_INTERVAL)
             while self.alive:
+                before = state_signature(self)
                 self.stabilize()
-                time.sleep(STABILIZE_INTERVAL)
+                time.sleep(interval.update(state_signature(self) != before))
 
         def failure_detector():
+            interval = AdaptiveInterval(CHECK_INTERVAL)
             while self.alive:
+                before = state_signature(self)
                 self.check_failures()
-                time.sleep(CHECK_INTERVAL)
+                time.sleep(interval.update(state_signature(self) != before))
 
         threading.Thread(target=stabilizer, daemon=True).start()
         threading.Thread(target=failure_detector, daemon=True).start()
@@ -63,6 +72,7 @@ class Node:
 
     def handle_failure(self, dead_node):
         with self.lock:
+            self.metrics.inc("failures_detected")
             # Eliminar de sucesores
             if dead_node in self.successors:
                 self.successors.remove(dead_node)
@@ -101,6 +111,7 @@ class Node:
         visited = set()
         current = self
         attempts = 0
+        start = time.perf_counter()
 
         while attempts < self.m:
             if current.id in visited:
@@ -110,6 +121,7 @@ class Node:
             current.record_contact(current)
 
             if between_right_incl(key, current.id, current.successors[0].id):
+                self.metrics.observe_lookup(time.perf_counter() - start, attempts)
                 return current.successors[0]
 
             next_node = current.closest_preceding_finger(key)
@@ -123,10 +135,12 @@ class Node:
             current = next_node
             attempts += 1
 
+        self.metrics.observe_lookup(time.perf_counter() - start, attempts)
         return self  # Fallback a sí mismo
 
     def stabilize(self):
         with self.lock:
+            self.metrics.inc("stabilize_rounds")
             try:
                 successor = self.successors[0]
                 x = successor.predecessor
@@ -148,6 +162,7 @@ class Node:
         with self.lock:
             if not self.predecessor or between(node.id, self.predecessor.id, self.id):
                 self.predecessor = node
+                self.metrics.inc("notify_changes")
                 node.record_contact(self)
 
             # Actualizar lista de sucesores
@@ -163,6 +178,7 @@ class Node:
                 if between_right_incl(key, dead_node.predecessor.id, dead_node.id):
                     successor = self.find_successor(key)
                     successor.data[key] = self.data[key]
+                    self.metrics.inc("handoff_keys")
 
     def store(self, key, value):
         with self.lock:
@@ -171,10 +187,12 @@ class Node:
             for i in range(TOLERANCE):
                 nodes.append(nodes[-1].successors[0])
 
-            for node in nodes:
+            for i, node in enumerate(nodes):
                 if node.is_alive():
                     node.data[key] = value
                     node.record_contact(self)
+                    if i > 0:
+                        self.metrics.inc("replication_pushes")
                 else:
                     self.handle_failure(node)
 
@@ -0,0 +1,196 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import chorddht
+from chorddht import (
+    HASH_SIZE,
+    TOLERANCE,
+    Node,
+    between_right_incl,
+    hash_value,
+    reload_network,
+)
+from expiry import live_items
+
+VNODES = 2  # Posiciones en el anillo por nodo físico
+
+
+def vnode_ids(name, count, taken=(), m=HASH_SIZE):
+    """Ids de las posiciones virtuales de `name`, evitando colisiones"""
+    ids = []
+    used = set(taken)
+    for i in range(count):
+        vid = hash_value(f"{name}#{i}", m)
+        for _ in range(2**m):
+            if vid not in used:
+                break
+            vid = (vid + 1) % 2**m
+        else:
+            raise ValueError("No quedan ids libres en el anillo")
+        used.add(vid)
+        ids.append(vid)
+    return ids
+
+
+class VirtualNode(Node):
+    """Una posición del anillo de un nodo físico.
+
+    El enrutamiento y el handoff la tratan como un miembro más del anillo,
+    pero los datos viven en el almacén del nodo físico y la vida la decide
+    el nodo físico.
+    """
+
+    def __init__(self, id, host, m=HASH_SIZE):
+        super().__init__(id, m)
+        self.host = host
+        self.data = host.store.setdefault(id, {})
+
+    def is_alive(self):
+        return self.alive and self.host.alive
+
+    def ttl_store(self):
+        # El almacén es del host: el reemplazo se registra también ahí
+        self.host.store[self.id] = super().ttl_store()
+        return self.data
+
+    def replicate_data(self):
+        # Réplicas en hosts distintos: una copia en un hermano no tolera fallos
+        targets = []
+        hosts = {self.host}
+        for successor in self.successors:
+            host = getattr(successor, "host", successor)
+            if successor.is_alive() and host not in hosts:
+                targets.append(successor)
+                hosts.add(host)
+                if len(targets) == TOLERANCE:
+                    break
+        for key, value in live_items(self.data):
+            for successor in targets:
+                successor.store_replica(key, value)
+                self.metrics.inc("replication_pushes")
+
+    def primary_data(self):
+        if not self.predecessor:
+            return dict(self.data)
+        return {
+            key: value
+            for key, value in self.data.items()
+            if between_right_incl(key, self.predecessor.id, self.id)
+        }
+
+    def __repr__(self):
+        return f"Node {self.id}@{self.host.name}"
+
+
+class PhysicalNode:
+    """Nodo físico que aloja varias posiciones virtuales del anillo"""
+
+    def __init__(self, name, vnodes=VNODES, taken=(), m=HASH_SIZE):
+        self.name = name
+        self.alive = True
+        self.store = {}  # id virtual -> datos de esa posición
+        self.vnodes = [
+            VirtualNode(vid, self, m) for vid in vnode_ids(name, vnodes, taken, m)
+        ]
+
+    def join(self, bootstrap):
+        for vnode in self.vnodes:
+            vnode.join(bootstrap)
+            bootstrap = bootstrap or vnode
+
+    def kill(self):
+        """Caída del nodo físico: cada rango pasa a un sucesor distinto en paralelo"""
+        handoffs = [(v, v.primary_data()) for v in self.vnodes]
+        self.alive = False
+        for vnode in self.vnodes:
+            vnode.alive = False
+        # Con el host ya caído el primer sucesor vivo está en otro host: un
+        # hermano no puede recibir el rango
+        handoffs = [(v, v.get_first_alive_successor(), data) for v, data in handoffs]
+
+        def handoff(item):
+            vnode, successor, data = item
+            if data and successor.is_alive():
+                successor.bulk_store(data)
+                vnode.metrics.inc("handoff_keys", len(data))
+
+        with ThreadPoolExecutor(max_workers=len(handoffs) or 1) as pool:
+            list(pool.map(handoff, handoffs))
+
+    def key_count(self):
+        return sum(len(data) for data in self.store.values())
+
+    def __repr__(self):
+        return f"Host {self.name} {[v.id for v in self.vnodes]}"
+
+
+def ring_members(hosts):
+    return [v for host in hosts for v in host.vnodes]
+
+
+def load_report(hosts):
+    """Fracción del anillo que posee cada host vivo y razón máximo/promedio"""
+    members = sorted(
+        (v for v in ring_members(hosts) if v.is_alive()), key=lambda v: v.id
+    )
+    share = {host.name: 0 for host in hosts if host.alive}
+    space = 2 ** members[0].m if members else 1
+    for i, vnode in enumerate(members):
+        size = (vnode.id - members[i - 1].id) % space or space
+        share[vnode.host.name] += size / space
+    mean = sum(share.values()) / len(share) if share else 0
+    return {
+        "share": share,
+        "max_mean_ratio": max(share.values()) / mean if mean else 0,
+    }
+
+
+def main():
+    import random
+
+    chorddht.VERBOSE = False
+    m = 16
+    names = [f"h{i}" for i in range(10)]
+    rng = random.Random(0)
+    keys = rng.sample(range(2**m), 5000)
+
+    for vnodes in (1, 16):
+        hosts = []
+        for name in names:
+            taken = [v.id for v in ring_members(hosts)]
+            hosts.append(PhysicalNode(name, vnodes, taken, m))
+        hosts[0].join(None)
+        for host in hosts[1:]:
+            host.join(hosts[0].vnodes[0])
+        members = ring_members(hosts)
+        for _ in range(3):
+            reload_network(members)
+        report = load_report(hosts)
+        print(f"{vnodes} ids por nodo: máx/prom {report['max_mean_ratio']:.2f}")
+
+        batches = {}
+        for key in keys:
+            owner = members[0].find_successor(key)
+            batches.setdefault(owner, {})[key] = f"value-{key}"
+        for owner, batch in batches.items():
+            owner.bulk_store(batch)
+        for vnode in members:
+            vnode.replicate_data()
+        hosts[1].kill()
+        reload_network(members)
+        report = load_report(hosts)
+        heir = max(report["share"], key=report["share"].get)
+        print(
+            f"  tras la caída de {hosts[1].name}: máx/prom"
+            f" {report['max_mean_ratio']:.2f}, el mayor ({heir}) tiene"
+            f" {report['share'][heir]:.0%} del anillo"
+        )
+        alive = [host for host in hosts if host.alive]
+        kept = sum(
+            any(key in data for host in alive for data in host.store.values())
+            for key in keys
+        )
+        print(f"  llaves conservadas: {kept}/{len(keys)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+import chorddht
+from chorddht import TOLERANCE
+
+BATCH_SIZE = 32  # Escrituras por lote como máximo
+BATCH_DELAY = 0.002  # Segundos que espera la primera escritura de un lote
+
+
+class WritePipeline:
+    """Commit en grupo de las escrituras de un nodo.
+
+    `submit` encola la escritura y devuelve un Future. Un hilo junta lotes
+    de hasta `max_batch` escrituras o `max_delay` segundos, los aplica en el
+    primario y los empuja a todas las réplicas en paralelo; cuando todas
+    confirman se completan los Futures del lote. `rtt` simula el viaje de
+    ida y vuelta de cada empuje.
+    """
+
+    def __init__(self, node, max_batch=BATCH_SIZE, max_delay=BATCH_DELAY, rtt=0.0):
+        self.node = node
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.rtt = rtt
+        self.queue = []  # (llave, valor, future)
+        self.ready = threading.Condition()
+        self.closed = False
+        self.batches = 0
+        self.executor = ThreadPoolExecutor(max_workers=TOLERANCE)
+        self.flusher = threading.Thread(target=self._run, daemon=True)
+        self.flusher.start()
+
+    def submit(self, key, value):
+        future = Future()
+        with self.ready:
+            if self.closed:
+                raise RuntimeError("WritePipeline cerrado")
+            self.queue.append((key, value, future))
+            if len(self.queue) == 1 or len(self.queue) >= self.max_batch:
+                self.ready.notify()
+        return future
+
+    def store(self, key, value):
+        """Escritura bloqueante: vuelve cuando el lote quedó replicado"""
+        self.submit(key, value).result()
+
+    def close(self):
+        with self.ready:
+            self.closed = True
+            self.ready.notify()
+        self.flusher.join()
+        self.executor.shutdown()
+
+    def _next_batch(self):
+        with self.ready:
+            while not self.queue and not self.closed:
+                self.ready.wait()
+            deadline = time.monotonic() + self.max_delay
+            while len(self.queue) < self.max_batch and not self.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.ready.wait(remaining)
+            batch = self.queue[: self.max_batch]
+            del self.queue[: self.max_batch]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return  # Cerrado y sin pendientes
+            try:
+                self._flush(batch)
+            except Exception as error:
+                for _, _, future in batch:
+                    future.set_exception(error)
+            else:
+                for _, _, future in batch:
+                    future.set_result(None)
+
+    def _push(self, replica, items):
+        if self.rtt:
+            time.sleep(self.rtt)
+        replica.bulk_store(items)
+
+    def _flush(self, batch):
+        items = {key: value for key, value, _ in batch}  # Gana la última
+        self.node.bulk_store(items)
+        replicas = [
+            s
+            for s in self.node.successors[:TOLERANCE]
+            if s.is_alive() and s is not self.node
+        ]
+        pending = [self.executor.submit(self._push, r, items) for r in replicas]
+        for done in wait(pending).done:
+            done.result()  # Propaga el error de una réplica al lote
+        self.node.metrics.inc("replication_pushes", len(replicas) * len(items))
+        self.batches += 1
+
+
+def sequential_store(node, key, value, rtt=0.0, lock=None):
+    """Camino actual de `store`: primario y luego cada réplica, una por una.
+
+    `lock` serializa las escrituras del nodo, como haría un nodo real que no
+    puede intercalar dos `store` sobre el mismo estado.
+    """
+    with lock or threading.Lock():
+        node.data[key] = value
+        for successor in node.successors[:TOLERANCE]:
+            if successor.is_alive() and successor is not node:
+                if rtt:
+                    time.sleep(rtt)
+                successor.store_replica(key, node.data[key])
+
+
+def benchmark(writers=64, writes=10, rtt=0.001):
+    from bootstrap import build_ring
+
+    chorddht.VERBOSE = False
+    nodes = build_ring([0, 2, 3, 5, 7])
+    primary = nodes[0]
+
+    def run(store):
+        latencies = []
+        lock = threading.Lock()
+
+        def writer(w):
+            for i in range(writes):
+                start = time.perf_counter()
+                store(w * writes + i, f"value-{w}-{i}")
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+
+        threads = [threading.Thread(target=writer, args=(w,)) for w in range(writers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        total = time.perf_counter() - start
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        return len(latencies) / total, p99 * 1000
+
+    print(f"{writers} escritores concurrentes, RTT de réplica {rtt * 1000:.1f} ms")
+    print(f"{'modo':14} {'escr/s':>9} {'p99 ms':>8}")
+    lock = threading.Lock()
+    throughput, p99 = run(lambda k, v: sequential_store(primary, k, v, rtt, lock))
+    print(f"{'secuencial':14} {throughput:9.0f} {p99:8.2f}")
+    for size in (1, 8, 32, 128):
+        pipeline = WritePipeline(primary, max_batch=size, rtt=rtt)
+        throughput, p99 = run(pipeline.store)
+        pipeline.close()
+        print(f"{'lote ' + str(size):14} {throughput:9.0f} {p99:8.2f}")
+
+
+if __name__ == "__main__":
+    benchmark()